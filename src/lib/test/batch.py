@@ -0,0 +1,165 @@
+"""Este módulo resuelve colecciones grandes de sudokus, repartiendo el
+trabajo entre varios procesos.
+
+El formato de entrada es un sudoku por línea, con grade**4 caracteres de
+CHAR_FONTS['alpha'] y '.' para las celdas vacías, como en Sudoku.from_str."""
+
+import mmap
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+from .characters import CHAR_FONTS
+from .solver import get_solver
+from .sudoku import CHAR_VALUES
+
+# Tablas para convertir líneas de texto en números de celdas y al revés,
+# con bytes.translate. Los caracteres inválidos se convierten en 255.
+_PARSE_TABLE = bytes(CHAR_VALUES.get(chr(c), 255) for c in range(256))
+_FORMAT_TABLE = bytes(
+    ord('.') if n == 0 else ord(CHAR_FONTS['alpha'][n]) if n < len(CHAR_FONTS['alpha']) else 255
+    for n in range(256)
+)
+
+
+def parse_puzzle(grade, line):
+    """Convierte una línea (bytes) en la lista plana de números de sus
+    celdas, o None si la línea no es un sudoku válido del grado dado."""
+    if len(line) != grade**4:
+        return None
+    cells = line.translate(_PARSE_TABLE)
+    if max(cells) > grade**2:
+        return None
+    return list(cells)
+
+
+def format_puzzle(cells):
+    """Convierte una lista plana de números en una línea (bytes)."""
+    return bytes(cells).translate(_FORMAT_TABLE)
+
+
+def _solve_chunk(job):
+    """Resuelve un grupo de líneas. Retorna las líneas de salida, cuántas no
+    se resolvieron y el tiempo de cada sudoku en segundos."""
+    (grade, solver, lines) = job
+    engine = get_solver(solver)
+    out = []
+    unsolved = 0
+    latencies = []
+    for line in lines:
+        start = perf_counter()
+        cells = parse_puzzle(grade, line)
+        solution = None if cells is None else engine.solve(grade, cells)
+        latencies.append(perf_counter() - start)
+        if solution is None:
+            # Se deja la línea como estaba, para conservar el orden
+            unsolved += 1
+            out.append(line)
+        else:
+            out.append(format_puzzle(solution))
+    return (out, unsolved, latencies)
+
+
+def _read_lines(src):
+    """Lee las líneas no vacías de src (una ruta o un archivo binario),
+    mapeando el archivo a memoria cuando se puede."""
+    data = None
+    if hasattr(src, 'read'):
+        lines = src
+    else:
+        with open(src, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Los archivos vacíos no se pueden mapear
+                return
+        lines = iter(data.readline, b'')
+    try:
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if data is not None:
+            data.close()
+
+
+def _chunks(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def percentile(values, p):
+    """Retorna el percentil p (0 a 100) de una lista ya ordenada."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def solve_corpus(src, dst, grade=3, solver='propagation', processes=None, chunk_size=1000):
+    """Resuelve todos los sudokus de src y escribe sus soluciones en dst,
+    en el mismo orden. Los sudokus que no se pueden resolver (o no son
+    válidos) se escriben sin cambios.
+
+    Argumentos:
+    src: ruta o archivo binario con un sudoku por línea.
+    dst: archivo binario donde escribir las soluciones.
+    grade: grado de los sudokus.
+    solver: motor a usar (ver solver.py).
+    processes: cantidad de procesos; por default uno por núcleo. Con 1 no
+    se crea ningún proceso.
+    chunk_size: cuántos sudokus mandar a cada proceso a la vez.
+
+    Retorna un diccionario con la cantidad de sudokus, los no resueltos,
+    sudokus por segundo y percentiles del tiempo por sudoku, en segundos."""
+    processes = processes or cpu_count()
+    start = perf_counter()
+    total = 0
+    unsolved = 0
+    latencies = []
+
+    def write(result):
+        nonlocal total, unsolved
+        (out, failed, times) = result
+        for line in out:
+            dst.write(line + b'\n')
+        total += len(out)
+        unsolved += failed
+        latencies.extend(times)
+
+    jobs = ((grade, solver, chunk) for chunk in _chunks(_read_lines(src), chunk_size))
+    if processes == 1:
+        for job in jobs:
+            write(_solve_chunk(job))
+    else:
+        with Pool(processes) as pool:
+            # Se mantienen pocos grupos pendientes para no leer todo el
+            # archivo por adelantado, y se escriben en orden
+            pending = deque()
+            for job in jobs:
+                pending.append(pool.apply_async(_solve_chunk, (job,)))
+                if len(pending) >= 2*processes:
+                    write(pending.popleft().get())
+            while pending:
+                write(pending.popleft().get())
+
+    elapsed = perf_counter() - start
+    latencies.sort()
+    return {
+        'puzzles': total,
+        'unsolved': unsolved,
+        'elapsed': elapsed,
+        'puzzles_per_sec': total / elapsed if elapsed else 0.0,
+        'latency': {
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else 0.0,
+        },
+    }
@@ -0,0 +1,413 @@
+"""Este módulo mide el rendimiento de Enigma y de Sudoku, para detectar
+regresiones y confirmar mejoras.
+
+Cada caso se ejecuta varias veces con semillas fijas; cada muestra es el
+promedio de un ciclo de llamadas que dura al menos una fracción de
+segundo (como timeit), para que una sola interrupción del sistema no
+cambie el resultado. Se reportan la mediana, el mínimo y las colas (p90,
+p99) de las muestras, en segundos, y el pico de memoria reservada
+durante una ejecución extra con tracemalloc. Los resultados se guardan
+como JSON y se pueden comparar contra otros guardados antes (la línea
+base); un caso sólo cuenta como más lento si lo son su mediana y su
+mínimo.
+
+Los casos de Sudoku se repiten con cada motor (ver solver.py, 'recursive'
+es Sudoku.recursive_solve) y los de Enigma con cada forma de traducir; el
+motor o la forma es parte del nombre del caso, para que compare sólo
+enfrente casos iguales.
+
+Uso:
+python -m <paquete>.bench [--quick]
+    [--only enigma,generate,solve,calls,batch,vectorized]
+    [--solvers recursive,propagation,exact_cover,iterative]
+    [--enigma translate,translate_batch,translate_parallel,stream]
+    [--out resultados.json] [--baseline base.json] [--tolerance 0.1]"""
+
+import argparse
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+from functools import partial
+from time import perf_counter, time
+
+from .batch import format_puzzle, percentile, solve_corpus
+from .enigma import Enigma, PermutationCache, Rotor
+from .solver import SOLVERS
+from .sudoku import Sudoku
+
+# Rotores I, II y III, y el reflector B
+_WIRINGS = (
+    ('EKMFLGDQVZNTOWYHXUSPAIBRCJ', 'R'),
+    ('AJDKSIRUXBLHWTMCQGZNPYFVOE', 'F'),
+    ('BDFHJLCPRTXVZNYEIWGAKMUSQO', 'W'),
+)
+_REFLECTOR = 'YRUHQSLDPXNGOKMIEBFZCWVJAT'
+
+# Configuraciones de Enigma: orden de los rotores y sus anillos
+ENIGMA_CONFIGS = {
+    'I-II-III': ((0, 1, 2), (0, 0, 0)),
+    'III-I-II': ((2, 0, 1), (0, 0, 0)),
+    'II-III-I/rings': ((1, 2, 0), (5, 12, 20)),
+}
+
+# Formas de traducir un mensaje con Enigma
+ENIGMA_MODES = {
+    'translate': lambda enigma, message: enigma.translate(message),
+    'translate_batch': lambda enigma, message: enigma.translate_batch(message),
+    'translate_parallel': lambda enigma, message: enigma.translate_parallel(message),
+    'stream': lambda enigma, message: ''.join(enigma.stream().encode(
+        message[i:i + (1 << 16)] for i in range(0, len(message), 1 << 16))),
+}
+
+# Motores de Sudoku; 'recursive' es recursive_solve (sin motor)
+SUDOKU_SOLVERS = ('recursive',) + tuple(SOLVERS)
+
+
+def _solver(name):
+    """Retorna el argumento solver de Sudoku para el motor name."""
+    return None if name == 'recursive' else name
+
+
+def summarize(times):
+    """Retorna la cantidad, la mediana, los percentiles 90 y 99, y el
+    mínimo y máximo de una lista de tiempos."""
+    times = sorted(times)
+    return {
+        'n': len(times),
+        'median': percentile(times, 50),
+        'p90': percentile(times, 90),
+        'p99': percentile(times, 99),
+        'min': times[0] if times else 0.0,
+        'max': times[-1] if times else 0.0,
+    }
+
+
+def _peak(fn):
+    """Retorna el pico de memoria reservada, en bytes, al llamar a fn."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _loop(fns):
+    """Retorna cuánto tarda llamar a cada función de fns, en orden, sin el
+    recolector de basura."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = perf_counter()
+        for fn in fns:
+            fn()
+        return perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure(runs, memory=True, rounds=1):
+    """Mide una lista de funciones sin argumentos, una muestra cada una.
+    Cada función prepara su caso y retorna otra función, que es la que se
+    mide (así la preparación no cuenta en el tiempo).
+
+    Cada muestra es el tiempo promedio de un ciclo de llamadas, cada una
+    sobre un caso recién preparado: la cantidad se calibra con la primera
+    función usando timeit.Timer.autorange, de modo que el ciclo dure al
+    menos 0.2 segundos. Con rounds > 1 se repiten todos los ciclos, uno de
+    cada función por vuelta, y la muestra de cada una es su ciclo más
+    rápido; así un momento lento de la máquina no afecta a todas las
+    muestras. Retorna el resumen de los tiempos y el pico de memoria de la
+    primera. Como en timeit, el recolector de basura no corre durante los
+    ciclos."""
+    times = [None] * len(runs)
+    if runs:
+        (number, _) = timeit.Timer(lambda: runs[0]()()).autorange()
+    for _ in range(rounds):
+        for (i, run) in enumerate(runs):
+            fns = [run() for _ in range(number)]
+            elapsed = _loop(fns) / number
+            del fns
+            if times[i] is None or elapsed < times[i]:
+                times[i] = elapsed
+    out = summarize(times)
+    if memory and runs:
+        out['peak_bytes'] = _peak(runs[0]())
+    return out
+
+
+def _enigma(config):
+    (order, rings) = ENIGMA_CONFIGS[config]
+    rotors = [Rotor(_WIRINGS[i][0], _WIRINGS[i][1], 0, ring) for (i, ring) in zip(order, rings)]
+    return Enigma(rotors[0], rotors[1], rotors[2], Rotor(_REFLECTOR), cache=PermutationCache())
+
+
+def bench_enigma(sizes=(100, 10000, 1000000), configs=tuple(ENIGMA_CONFIGS), repeat=9,
+                 modes=('translate',)):
+    """Mide cada forma de traducir (ver ENIGMA_MODES) con mensajes de cada
+    tamaño y cada configuración de rotores. Las tablas de permutación se
+    calculan antes, con una traducción que no se mide; se reportan también
+    caracteres por segundo según la mediana."""
+    results = {}
+    for config in configs:
+        enigma = _enigma(config)
+        for size in sizes:
+            message = ''.join(random.Random(size).choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(size))
+            for mode in modes:
+                def run(translate=ENIGMA_MODES[mode]):
+                    def fn():
+                        # Cada llamada del ciclo traduce desde la misma posición
+                        enigma.r1.offset = enigma.r2.offset = enigma.r3.offset = 0
+                        translate(enigma, message)
+                    return fn
+
+                run()()
+                out = measure([run] * repeat)
+                out['chars_per_sec'] = size / out['median'] if out['median'] else 0.0
+                results[f'enigma.{mode}/{config}/{size}'] = out
+    return results
+
+
+def bench_generate(grades=(2, 3, 4), difficulties=(0.2, 0.5, 0.8), methods=('search', 'transform'),
+                   seeds=range(5), unique=False, solvers=('recursive',), rounds=3):
+    """Mide Sudoku.generate_sudoku para cada motor, grado, dificultad y
+    método, con un generador de números aleatorios por semilla (una
+    muestra por semilla, la mejor de rounds vueltas)."""
+    results = {}
+    for solver in solvers:
+        for grade in grades:
+            for difficulty in difficulties:
+                for method in methods:
+                    def runs():
+                        for seed in seeds:
+                            def run(seed=seed):
+                                sudoku = Sudoku(grade, difficulty, solver=_solver(solver), rng=random.Random(seed))
+                                return lambda: sudoku.generate_sudoku(unique, method)
+                            yield run
+                    name = f'sudoku.generate/{solver}/{method}/g{grade}/d{difficulty}'
+                    results[name] = measure(list(runs()), rounds=rounds)
+    return results
+
+
+def bench_solve(grades=(2, 3, 4), seeds=range(5), solvers=('recursive',), rounds=3):
+    """Mide Sudoku.solve con cada motor sobre el tablero que resuelve
+    generate_sudoku: los cuadrados diagonales llenos con cada semilla y el
+    resto vacío (una muestra por semilla, la mejor de rounds vueltas)."""
+    results = {}
+    for solver in solvers:
+        for grade in grades:
+            def runs():
+                for seed in seeds:
+                    def run(seed=seed):
+                        sudoku = Sudoku(grade, rng=random.Random(seed), solver=_solver(solver))
+                        for i in range(grade if grade > 2 else 1):
+                            sudoku.fill_subsquare(i*grade + i)
+                        return sudoku.solve
+                    yield run
+            results[f'sudoku.solve/{solver}/g{grade}'] = measure(list(runs()), rounds=rounds)
+    return results
+
+
+def _corpus(grade, count, difficulty=0.5, seed=0):
+    """Retorna count sudokus generados con semillas fijas, como listas
+    planas de números."""
+    puzzles = []
+    for i in range(count):
+        sudoku = Sudoku(grade, difficulty, solver='propagation', rng=random.Random(seed + i))
+        sudoku.generate_sudoku(method='transform')
+        puzzles.append(sudoku.board.cells())
+    return puzzles
+
+
+def bench_batch(grades=(3,), count=100, repeat=5, solvers=tuple(SOLVERS), processes=1):
+    """Mide batch.solve_corpus con cada motor sobre un archivo en memoria
+    de count sudokus de cada grado. Con processes=1 (el default) se mide
+    sólo el motor, sin el costo de repartir el trabajo entre procesos; se
+    reportan también sudokus por segundo según la mediana."""
+    results = {}
+    for grade in grades:
+        data = b''.join(format_puzzle(cells) + b'\n' for cells in _corpus(grade, count))
+        for solver in solvers:
+            if solver == 'recursive':
+                # solve_corpus sólo usa los motores de solver.py
+                continue
+
+            def run(solver=solver):
+                return lambda: solve_corpus(io.BytesIO(data), io.BytesIO(), grade, solver, processes)
+
+            out = measure([run] * repeat)
+            out['puzzles_per_sec'] = count / out['median'] if out['median'] else 0.0
+            results[f'batch.solve_corpus/{solver}/g{grade}'] = out
+    return results
+
+
+def bench_vectorized(grades=(3,), count=100, repeat=5, solvers=tuple(SOLVERS)):
+    """Mide vectorized.solve_boards con cada motor (el que resuelve los
+    tableros que la propagación no termina) sobre los mismos sudokus que
+    bench_batch. Requiere numpy."""
+    import numpy as np
+    from .vectorized import solve_boards
+
+    results = {}
+    for grade in grades:
+        grids = np.array(_corpus(grade, count), dtype=np.uint8).reshape(count, grade**2, grade**2)
+        for solver in solvers:
+            if solver == 'recursive':
+                continue
+
+            def run(solver=solver):
+                return lambda: solve_boards(grids, grade, solver)
+
+            out = measure([run] * repeat)
+            out['puzzles_per_sec'] = count / out['median'] if out['median'] else 0.0
+            results[f'vectorized.solve_boards/{solver}/g{grade}'] = out
+    return results
+
+
+def bench_calls(grades=(3,), calls=20000, seed=0, loop=200):
+    """Mide la latencia de cada llamada a render, update_conflicts e
+    is_solved en un sudoku generado, escribiendo antes de cada llamada un
+    número al azar en una celda modificable, como haría un jugador.
+
+    Cada muestra es el promedio de un ciclo de loop escrituras y llamadas
+    (el tiempo incluye la escritura, que es mucho más corta), así que hay
+    calls/loop muestras."""
+    results = {}
+    for grade in grades:
+        rng = random.Random(seed)
+        sudoku = Sudoku(grade, 0.5, rng=rng)
+        sudoku.generate_sudoku()
+        cells = [idx for idx in range(sudoku.size**2) if not sudoku.board.is_given(idx)]
+        sudoku.render()
+        for (name, call) in (('render', sudoku.render),
+                             ('update_conflicts', lambda: sudoku.update_conflicts(0, 0)),
+                             ('is_solved', sudoku.is_solved)):
+            times = []
+            for _ in range(max(calls // loop, 1)):
+                fns = []
+                for _ in range(loop):
+                    idx = rng.choice(cells)
+                    fns.append(partial(sudoku.set_cell, idx % sudoku.size, idx // sudoku.size,
+                                       rng.randint(0, sudoku.size)))
+                    fns.append(call)
+                times.append(_loop(fns) / loop)
+            out = summarize(times)
+            out['peak_bytes'] = _peak(call)
+            results[f'sudoku.{name}/g{grade}'] = out
+    return results
+
+
+def run(only=('enigma', 'generate', 'solve', 'calls', 'batch', 'vectorized'), quick=False,
+        solvers=SUDOKU_SOLVERS, enigma=('translate', 'translate_batch')):
+    """Ejecuta los grupos de casos indicados, con los motores de Sudoku y
+    las formas de traducir de Enigma indicadas. Con quick se usan menos
+    repeticiones y casos más chicos. Retorna un diccionario listo para
+    guardarse como JSON, con los resultados por nombre de caso."""
+    results = {}
+    if 'enigma' in only:
+        results.update(bench_enigma(sizes=(100, 10000) if quick else (100, 10000, 1000000),
+                                    repeat=5 if quick else 9, modes=enigma))
+    if 'generate' in only:
+        results.update(bench_generate(grades=(2, 3) if quick else (2, 3, 4),
+                                      seeds=range(3 if quick else 5), solvers=solvers))
+    if 'solve' in only:
+        results.update(bench_solve(grades=(2, 3) if quick else (2, 3, 4),
+                                   seeds=range(3 if quick else 5), solvers=solvers))
+    if 'calls' in only:
+        results.update(bench_calls(calls=4000 if quick else 20000))
+    # Con grado 4 bastan menos sudokus, cada uno tarda mucho más
+    if 'batch' in only:
+        results.update(bench_batch(grades=(3,), count=20 if quick else 100, solvers=solvers))
+        if not quick:
+            results.update(bench_batch(grades=(4,), count=20, solvers=solvers))
+    if 'vectorized' in only:
+        results.update(bench_vectorized(grades=(3,), count=20 if quick else 100, solvers=solvers))
+        if not quick:
+            results.update(bench_vectorized(grades=(4,), count=20, solvers=solvers))
+    return {
+        'meta': {
+            'time': time(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'quick': quick,
+            'solvers': list(solvers),
+            'enigma': list(enigma),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.1):
+    """Compara dos resultados de run. Retorna un diccionario por caso
+    presente en ambos, con las razones entre la mediana actual y la de la
+    línea base y entre los mínimos, y su estado: 'slower' o 'faster' sólo
+    si las dos razones pasan de tolerance (0.1 es 10%) hacia el mismo
+    lado, o 'same' si no. El ruido del sistema sólo hace más lentas
+    algunas muestras, así que rara vez mueve el mínimo y la mediana a la
+    vez."""
+    out = {}
+    for (name, result) in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base['median'] or not base['min']:
+            continue
+        ratio = result['median'] / base['median']
+        min_ratio = result['min'] / base['min']
+        if ratio > 1 + tolerance and min_ratio > 1 + tolerance:
+            status = 'slower'
+        elif ratio < 1 - tolerance and min_ratio < 1 - tolerance:
+            status = 'faster'
+        else:
+            status = 'same'
+        out[name] = {'ratio': ratio, 'min_ratio': min_ratio, 'status': status}
+    return out
+
+
+def main(argv=None):
+    """Ejecuta los casos desde la línea de comandos. Retorna 1 si algún
+    caso fue más lento que la línea base, 0 si no."""
+    parser = argparse.ArgumentParser(description='Mide el rendimiento de Enigma y Sudoku.')
+    parser.add_argument('--quick', action='store_true', help='menos repeticiones y casos más chicos')
+    parser.add_argument('--only', default='enigma,generate,solve,calls,batch,vectorized',
+                        help='grupos de casos separados por comas')
+    parser.add_argument('--solvers', default=','.join(SUDOKU_SOLVERS),
+                        help='motores de Sudoku separados por comas')
+    parser.add_argument('--enigma', default='translate,translate_batch',
+                        help='formas de traducir de Enigma separadas por comas: '
+                             + ', '.join(ENIGMA_MODES))
+    parser.add_argument('--out', help='archivo donde guardar los resultados (JSON)')
+    parser.add_argument('--baseline', help='resultados guardados antes, para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='diferencia relativa de la mediana y el mínimo que se considera igual')
+    args = parser.parse_args(argv)
+    solvers = args.solvers.split(',')
+    enigma = args.enigma.split(',')
+    for solver in solvers:
+        if solver not in SUDOKU_SOLVERS:
+            parser.error(f'motor desconocido: {solver}')
+    for mode in enigma:
+        if mode not in ENIGMA_MODES:
+            parser.error(f'forma de traducir desconocida: {mode}')
+
+    current = run(only=args.only.split(','), quick=args.quick, solvers=solvers, enigma=enigma)
+    if args.baseline:
+        with open(args.baseline) as f:
+            current['comparison'] = compare(current, json.load(f), args.tolerance)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+    else:
+        json.dump(current, sys.stdout, indent=2, sort_keys=True)
+        print()
+    comparison = current.get('comparison', {})
+    return int(any(c['status'] == 'slower' for c in comparison.values()))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
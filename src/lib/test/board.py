@@ -0,0 +1,165 @@
+"""Este módulo contiene la clase Board, una representación compacta de un
+tablero de Sudoku, y las vistas que permiten usarla como matriz."""
+
+
+class Board():
+    """Tablero compacto. Todo el estado vive en un solo buffer de bytes:
+    primero un byte por celda con su número (0 es una celda vacía), después
+    un mapa de bits con las celdas predeterminadas y al final otro con las
+    celdas incorrectas. La celda (col, row) está en el índice row*size + col.
+
+    Un tablero de 9x9 ocupa 103 bytes de datos."""
+    __slots__ = ('grade', 'size', 'data')
+
+    def __init__(self, grade, data=None):
+        self.grade = grade
+        self.size = grade**2
+        if data is None:
+            data = bytearray(Board.nbytes(grade))
+        elif len(data) != Board.nbytes(grade):
+            raise ValueError('El buffer no tiene el tamaño correcto para el grado.')
+        self.data = data
+
+    @staticmethod
+    def nbytes(grade):
+        """Retorna el tamaño en bytes de un tablero del grado especificado."""
+        cells = grade**4
+        return cells + 2*((cells + 7) // 8)
+
+    def index(self, col, row):
+        """Retorna el índice de la celda (col, row)."""
+        return row*self.size + col
+
+    def get(self, idx):
+        """Retorna el número en la celda idx."""
+        return self.data[idx]
+
+    def set(self, idx, n):
+        """Escribe el número n en la celda idx."""
+        self.data[idx] = n
+
+    def _bit(self, bitmap, idx):
+        cells = self.size**2
+        byte = cells + bitmap*((cells + 7) // 8) + (idx >> 3)
+        return (byte, 1 << (idx & 7))
+
+    def is_given(self, idx):
+        """Retorna si la celda idx es predeterminada."""
+        (byte, bit) = self._bit(0, idx)
+        return bool(self.data[byte] & bit)
+
+    def set_given(self, idx, given):
+        """Marca o desmarca la celda idx como predeterminada."""
+        (byte, bit) = self._bit(0, idx)
+        if given:
+            self.data[byte] |= bit
+        else:
+            self.data[byte] &= ~bit
+
+    def is_correct(self, idx):
+        """Retorna si el número en la celda idx es correcto."""
+        (byte, bit) = self._bit(1, idx)
+        return not self.data[byte] & bit
+
+    def set_correct(self, idx, correct):
+        """Marca el número en la celda idx como correcto o incorrecto."""
+        (byte, bit) = self._bit(1, idx)
+        if correct:
+            self.data[byte] &= ~bit
+        else:
+            self.data[byte] |= bit
+
+    def cells(self):
+        """Retorna una vista de sólo las celdas, sin copiarlas."""
+        return memoryview(self.data)[:self.size**2]
+
+    def to_bytes(self):
+        """Retorna una copia del tablero como bytes."""
+        return bytes(self.data)
+
+    def view(self):
+        """Retorna una vista del buffer del tablero, sin copiarlo."""
+        return memoryview(self.data)
+
+    @staticmethod
+    def from_buffer(grade, buffer):
+        """Crea un tablero sobre el buffer proporcionado. Si se puede
+        escribir en él (bytearray, memoryview de un bytearray, mmap...), el
+        tablero lo usa directamente sin copiarlo; si no, se copia."""
+        view = memoryview(buffer).cast('B')
+        if view.readonly:
+            return Board(grade, bytearray(view))
+        return Board(grade, view)
+
+    def copy(self):
+        """Retorna una copia independiente del tablero."""
+        return Board(self.grade, bytearray(self.data))
+
+
+class GridView():
+    """Vista de una matriz del tablero como lista de filas, para que siga
+    funcionando el acceso matriz[fila][columna]. Las lecturas y escrituras
+    se hacen a través de las funciones get(idx) y set(idx, valor)."""
+    __slots__ = ('size', 'get', 'set')
+
+    def __init__(self, size, get, set):
+        self.size = size
+        self.get = get
+        self.set = set
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError('Fila fuera del tablero.')
+        return RowView(self, row)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return (RowView(self, row) for row in range(self.size))
+
+    def __eq__(self, other):
+        return self.tolist() == [list(row) for row in other]
+
+    def tolist(self):
+        """Retorna una copia de la matriz como lista de listas."""
+        return [list(row) for row in self]
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+
+class RowView():
+    """Una fila de GridView."""
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, row):
+        self.grid = grid
+        self.offset = row*grid.size
+
+    def _index(self, col):
+        if col < 0:
+            col += self.grid.size
+        if not 0 <= col < self.grid.size:
+            raise IndexError('Columna fuera del tablero.')
+        return self.offset + col
+
+    def __getitem__(self, col):
+        return self.grid.get(self._index(col))
+
+    def __setitem__(self, col, value):
+        self.grid.set(self._index(col), value)
+
+    def __len__(self):
+        return self.grid.size
+
+    def __iter__(self):
+        return (self.grid.get(self.offset + col) for col in range(self.grid.size))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
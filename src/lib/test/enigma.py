@@ -1,4 +1,26 @@
-import re
+import heapq
+import io
+from collections import OrderedDict, namedtuple
+from itertools import islice, permutations
+from math import log
+from multiprocessing import Pool, cpu_count
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_LETTERS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_UPPERCASE = bytes.maketrans(_LETTERS[26:], _LETTERS[:26])
+_NON_LETTERS = bytes(c for c in range(256) if c not in _LETTERS)
+
+
+def sanitize(message):
+    # Equivalent to re.sub('[^a-zA-Z]', '', message).upper(), as ASCII bytes.
+    if isinstance(message, str):
+        message = message.encode('ascii', 'ignore')
+    return bytes(message).translate(_UPPERCASE, _NON_LETTERS)
+
 
 class Rotor(object):
     def __init__(self, wiring, notch=None, offset=0, ringOffset=0):
@@ -8,14 +30,40 @@ class Rotor(object):
         self.offset = offset
         self.ringOffset = ringOffset
 
+    @property
+    def wiring(self):
+        return self._wiring
+
+    @wiring.setter
+    def wiring(self, wiring):
+        # Forward and inverse tables in integer space, built once per wiring
+        # so that translating never has to search the alphabet.
+        self._wiring = wiring
+        self._forward = [self._ALPHABET.index(c) for c in wiring]
+        self._inverse = [0] * 26
+        for i, j in enumerate(self._forward):
+            self._inverse[j] = i
+
+    @property
+    def notch(self):
+        return self._notch
+
+    @notch.setter
+    def notch(self, notch):
+        self._notch = notch
+        self._notchIndex = -1 if notch is None else self._ALPHABET.index(notch)
+
+    def translate_index(self, i, previousOffset=0):
+        return self._forward[(i + self.offset + self.ringOffset - previousOffset) % 26]
+
+    def reverse_translate_index(self, i, previousOffset=0):
+        return self._inverse[(i + self.offset + self.ringOffset - previousOffset) % 26]
+
     def translate(self, s, previousOffset=0):
         out = []
         for char in s:
             out.append(
-                self.wiring[(self._ALPHABET.index(char)
-                            + self.offset
-                            + self.ringOffset
-                            - previousOffset) % 26]
+                self._ALPHABET[self.translate_index(ord(char) - 65, previousOffset)]
             )
 
         return ''.join(out)
@@ -23,50 +71,500 @@ class Rotor(object):
     def reverse_translate(self, s, previousOffset=0):
         out = []
         for char in s:
-            c = self._ALPHABET[(self._ALPHABET.index(char)
-                               + self.offset
-                               + self.ringOffset
-                               - previousOffset) % 26]
             out.append(
-                self._ALPHABET[self.wiring.index(c)]
+                self._ALPHABET[self.reverse_translate_index(ord(char) - 65, previousOffset)]
             )
 
         return ''.join(out)
 
 
+class PermutationCache(object):
+    # One table per rotor/reflector configuration. A table holds the full
+    # machine permutation for each of the 26**3 rotor positions, 26 bytes per
+    # position, and is filled in lazily as positions are visited (or all at
+    # once with Enigma.compile). Whole tables are evicted least recently used
+    # first once maxBytes is exceeded.
+    TABLE_SIZE = 26 ** 4
+
+    def __init__(self, maxBytes=16 * 2 ** 20):
+        self.maxBytes = maxBytes
+        self._tables = OrderedDict()
+
+    def table(self, key):
+        table = self._tables.get(key)
+        if table is None:
+            table = bytearray(self.TABLE_SIZE)
+            self._tables[key] = table
+            # Always keep the table that was just asked for, even if a single
+            # table is already over the cap.
+            while len(self._tables) > max(1, self.maxBytes // self.TABLE_SIZE):
+                self._tables.popitem(last=False)
+        else:
+            self._tables.move_to_end(key)
+        return table
+
+    def clear(self):
+        self._tables.clear()
+
+    def __len__(self):
+        return len(self._tables)
+
+
+POSITION_CACHE = PermutationCache()
+
+
 class Enigma(object):
-    def __init__(self, r1, r2, r3, reflector):
+    def __init__(self, r1, r2, r3, reflector, cache=None):
         self.r1 = r1
         self.r2 = r2
         self.r3 = r3
         self.reflector = reflector
+        self.cache = POSITION_CACHE if cache is None else cache
         self._STATIC_ROTOR = Rotor(r1._ALPHABET)
 
+    def __getstate__(self):
+        # Caches are per process; don't ship permutation tables to workers.
+        state = self.__dict__.copy()
+        del state['cache']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache = POSITION_CACHE
+
+    def _key(self):
+        return (self.r1.wiring, self.r1.ringOffset,
+                self.r2.wiring, self.r2.ringOffset,
+                self.r3.wiring, self.r3.ringOffset,
+                self.reflector.wiring, self.reflector.offset, self.reflector.ringOffset)
+
+    def _compile_position(self, table, o1, o2, o3):
+        # Same path as a single character takes through the machine, with the
+        # rotors at offsets (o1, o2, o3) after stepping.
+        r1, r2, r3 = self.r1, self.r2, self.r3
+        f1, f2, f3 = r1._forward, r2._forward, r3._forward
+        v1, v2, v3 = r1._inverse, r2._inverse, r3._inverse
+        g1, g2, g3 = r1.ringOffset, r2.ringOffset, r3.ringOffset
+        static = self._STATIC_ROTOR._forward
+        base = ((o1 * 26 + o2) * 26 + o3) * 26
+        for i in range(26):
+            j = f3[(i + o3 + g3) % 26]
+            j = f2[(j + o2 + g2 - o3) % 26]
+            j = f1[(j + o1 + g1 - o2) % 26]
+            j = self.reflector.translate_index(j)
+            j = v1[(j + o1 + g1) % 26]
+            j = v2[(j + o2 + g2 - o1) % 26]
+            j = v3[(j + o3 + g3 - o2) % 26]
+            table[base + i] = static[(j - o3) % 26] + 65
+
+    def compile(self):
+        table = self.cache.table(self._key())
+        if np is not None:
+            self._compile_missing(table)
+            return table
+        for o1 in range(26):
+            for o2 in range(26):
+                for o3 in range(26):
+                    if not table[((o1 * 26 + o2) * 26 + o3) * 26]:
+                        self._compile_position(table, o1, o2, o3)
+        return table
+
+    def _compile_missing(self, table):
+        # Vectorized version of _compile_position over every position of the
+        # table that has not been filled in yet.
+        table = np.frombuffer(table, dtype=np.uint8).reshape(26 ** 3, 26)
+        positions = np.flatnonzero(table[:, 0] == 0)
+        if not len(positions):
+            return table
+        o1 = (positions // 676)[:, None]
+        o2 = (positions // 26 % 26)[:, None]
+        o3 = (positions % 26)[:, None]
+        r1, r2, r3 = self.r1, self.r2, self.r3
+        f1, f2, f3 = (np.array(r._forward) for r in (r1, r2, r3))
+        v1, v2, v3 = (np.array(r._inverse) for r in (r1, r2, r3))
+        g1, g2, g3 = r1.ringOffset, r2.ringOffset, r3.ringOffset
+        reflector = np.array(self.reflector._forward)
+        g4 = self.reflector.offset + self.reflector.ringOffset
+        static = np.array(self._STATIC_ROTOR._forward)
+        j = np.arange(26)[None, :]
+        j = f3[(j + o3 + g3) % 26]
+        j = f2[(j + o2 + g2 - o3) % 26]
+        j = f1[(j + o1 + g1 - o2) % 26]
+        j = reflector[(j + g4) % 26]
+        j = v1[(j + o1 + g1) % 26]
+        j = v2[(j + o2 + g2 - o1) % 26]
+        j = v3[(j + o3 + g3 - o2) % 26]
+        table[positions] = static[(j - o3) % 26] + 65
+        return table
+
+    def _trajectory(self, n):
+        # Rotor positions for the next n characters. Stepping only depends on
+        # the starting offsets and the notches, never on the text: r3 cycles,
+        # r2 is constant between r3 notch hits, and r1 steps on every
+        # character while r2 sits on its notch.
+        n2, n3 = self.r2._notchIndex, self.r3._notchIndex
+        c1, c2, c3 = self.r1.offset, self.r2.offset, self.r3.offset
+        o3 = np.resize((c3 + np.arange(1, 27, dtype=np.int32)) % 26, n)
+        # Character count (1-based) at which r3 first reaches its notch.
+        first = (n3 - c3 - 1) % 26 + 1 if n3 >= 0 else n + 1
+        hits = (n - first) // 26 + 1 if n >= first else 0
+        lengths = np.full(hits + 1, 26, dtype=np.int64)
+        lengths[0] = min(first - 1, n)
+        if hits:
+            lengths[-1] = n - (first - 1) - 26 * (hits - 1)
+        o2 = np.repeat((c2 + np.arange(hits + 1, dtype=np.int32)) % 26, lengths)
+        o1 = (c1 + np.cumsum(o2 == n2, dtype=np.int32)) % 26
+        if n:
+            self.r1.offset, self.r2.offset, self.r3.offset = int(o1[-1]), int(o2[-1]), int(o3[-1])
+        return (o1 * 26 + o2) * 26 + o3
+
+    def translate_batch(self, messages, blockSize=1 << 18):
+        # Same output as calling translate on each message in turn, computed
+        # with numpy gathers over blockSize characters at a time. Accepts a
+        # list of messages or a single str/bytes buffer.
+        if np is None:
+            raise ImportError('translate_batch requires numpy')
+        single = isinstance(messages, (str, bytes, bytearray, memoryview))
+        if single:
+            messages = [messages]
+        sanitized = [sanitize(m) for m in messages]
+        letters = np.frombuffer(b''.join(sanitized), dtype=np.uint8)
+        table = self._compile_missing(self.cache.table(self._key())).ravel()
+        out = np.empty(len(letters), dtype=np.uint8)
+        for start in range(0, len(letters), blockSize):
+            block = letters[start:start + blockSize]
+            out[start:start + len(block)] = table[self._trajectory(len(block)) * 26 + (block - 65)]
+
+        out = out.tobytes()
+        results = []
+        start = 0
+        for m in sanitized:
+            results.append(out[start:start + len(m)].decode('ascii'))
+            start += len(m)
+        return results[0] if single else results
+
     def translate(self, message):
-        out = []
-        sanitized_message = re.sub('[^a-zA-Z]', '',  message).upper()
-        for char in sanitized_message:
-            self.r3.offset = (self.r3.offset + 1) % 26
-            if self.r3.offset == 22:
-                pass
-            c = self.r3.translate(char)
+        sanitized_message = sanitize(message)
+        out = bytearray(len(sanitized_message))
+        table = self.cache.table(self._key())
+        o1, o2, o3 = self.r1.offset, self.r2.offset, self.r3.offset
+        n2, n3 = self.r2._notchIndex, self.r3._notchIndex
+        for (idx, char) in enumerate(sanitized_message):
+            o3 = (o3 + 1) % 26
+            if o3 == n3:
+                o2 = (o2 + 1) % 26
+            if o2 == n2:
+                o1 = (o1 + 1) % 26
 
-            if r3._ALPHABET[self.r3.offset] == self.r3.notch:
-                r2.offset = (self.r2.offset + 1) % 26
-            c = self.r2.translate(c, self.r3.offset)
+            base = ((o1 * 26 + o2) * 26 + o3) * 26
+            if not table[base]:
+                self._compile_position(table, o1, o2, o3)
+            out[idx] = table[base + char - 65]
 
-            if r2._ALPHABET[self.r2.offset] == self.r2.notch:
-                r1.offset = (self.r1.offset + 1) % 26
-            c = self.r1.translate(c, self.r2.offset)
+        self.r1.offset, self.r2.offset, self.r3.offset = o1, o2, o3
+        return out.decode('ascii')
 
-            c = self.reflector.translate(c)
+    def state_at(self, k):
+        # Rotor offsets after k more characters, in closed form. r3 reaches
+        # its notch for the first time after `first` characters and every 26
+        # after that, each time moving r2 on. r1 steps on every character
+        # typed while r2 sits on its notch, which is what makes the machine
+        # double-step.
+        c1, c2, c3 = self.r1.offset, self.r2.offset, self.r3.offset
+        n2, n3 = self.r2._notchIndex, self.r3._notchIndex
+        if n3 < 0 or k < (n3 - c3 - 1) % 26 + 1:
+            hits, first = 0, k + 1
+        else:
+            first = (n3 - c3 - 1) % 26 + 1
+            hits = (k - first) // 26 + 1
+        steps = 0
+        # r2 holds offset (c2 + j) % 26 for a run of characters between hits
+        # j and j + 1, 26 characters long except for the first and last runs.
+        d = (n2 - c2) % 26
+        if n2 >= 0 and hits >= d:
+            steps = 26 * ((hits - d) // 26 + 1)
+            if d == 0:
+                steps += min(first - 1, k) - 26
+            if hits and (hits - d) % 26 == 0:
+                steps += k - (first - 1) - 26 * (hits - 1) - 26
+        return ((c1 + steps) % 26, (c2 + hits) % 26, (c3 + k) % 26)
 
-            c = self.r1.reverse_translate(c)
-            c = self.r2.reverse_translate(c, self.r1.offset)
-            c = self.r3.reverse_translate(c, self.r2.offset)
-            out.append(self._STATIC_ROTOR.translate(c, r3.offset))
+    def seek(self, k):
+        self.r1.offset, self.r2.offset, self.r3.offset = self.state_at(k)
+
+    def _parallel(self, chunks, processes):
+        # Encrypts each chunk in a worker starting from its precomputed rotor
+        # state, a pool-sized window of chunks at a time so that input is not
+        # read ahead without bound.
+        processes = processes or cpu_count()
+        chunks = iter(chunks)
+        with Pool(processes) as pool:
+            while True:
+                jobs = []
+                for chunk in islice(chunks, processes * 2):
+                    chunk = sanitize(chunk)
+                    jobs.append((self, self.state_at(0), chunk))
+                    self.seek(len(chunk))
+                if not jobs:
+                    break
+                for out in pool.map(_translate_chunk, jobs):
+                    yield out
+
+    def translate_parallel(self, message, processes=None, chunkSize=1 << 22):
+        data = sanitize(message)
+        chunks = (data[i:i + chunkSize] for i in range(0, len(data), chunkSize))
+        return ''.join(self._parallel(chunks, processes))
+
+    def stream(self):
+        return EnigmaStream(self)
+
+    def encrypt_file(self, src, dst, bufferSize=1 << 16, processes=None):
+        # src and dst are paths or file objects, binary or text; ciphertext is
+        # written as str to text streams and as bytes otherwise. This is the
+        # constant-memory path: only bufferSize characters of plaintext are
+        # held in memory at a time, or a few per worker when processes is
+        # given, however long the lines of src are.
+        with _open(src, 'rb') as fsrc, _open(dst, 'wb') as fdst:
+            chunks = _read_chunks(fsrc, bufferSize)
+            if processes:
+                outs = self._parallel(chunks, processes)
+            else:
+                outs = self.stream().encode(chunks)
+            text = isinstance(fdst, io.TextIOBase)
+            for out in outs:
+                fdst.write(out if text else out.encode('ascii'))
+
+
+def _read_chunks(file, size):
+    # Fixed-size reads up to end of file, which is b'' for binary files and
+    # '' for text ones.
+    while True:
+        chunk = file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _translate_chunk(job):
+    enigma, state, chunk = job
+    enigma.r1.offset, enigma.r2.offset, enigma.r3.offset = state
+    return enigma.translate(chunk) if np is None else enigma.translate_batch(chunk)
+
+
+class EnigmaStream(object):
+    # Incremental encoder. The rotor state lives in the wrapped Enigma, so it
+    # carries over from one feed() call to the next. encode() takes any
+    # iterable of str or bytes chunks; a file object iterates by lines, so a
+    # file without newlines would be read in one piece. Use
+    # Enigma.encrypt_file to encrypt files in fixed-size buffers.
+    def __init__(self, enigma):
+        self.enigma = enigma
+        self._translate = enigma.translate if np is None else enigma.translate_batch
+
+    def feed(self, chunk):
+        return self._translate(chunk)
+
+    def encode(self, chunks):
+        for chunk in chunks:
+            out = self.feed(chunk)
+            if out:
+                yield out
+
+
+class _open(object):
+    # Opens paths, passes already open file objects through untouched.
+    def __init__(self, file, mode):
+        self.file = file
+        self.mode = mode
+        self._owned = None
+
+    def __enter__(self):
+        if hasattr(self.file, 'read') or hasattr(self.file, 'write'):
+            return self.file
+        self._owned = open(self.file, self.mode)
+        return self._owned
+
+    def __exit__(self, *exc):
+        if self._owned is not None:
+            self._owned.close()
+
+# Relative letter frequencies of English text, A to Z.
+ENGLISH_FREQUENCIES = [
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153, 0.772, 4.025, 2.406,
+    6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+]
+_ENGLISH_LOG = [log(f / 100) for f in ENGLISH_FREQUENCIES]
+
+
+def english_score(text):
+    # Mean log-probability of each letter under English frequencies.
+    # text is sanitized ASCII bytes.
+    if not text:
+        return float('-inf')
+    return sum(_ENGLISH_LOG[c - 65] for c in text) / len(text)
+
+
+def index_of_coincidence(text):
+    n = len(text)
+    if n < 2:
+        return 0.0
+    counts = [0] * 26
+    for c in text:
+        counts[c - 65] += 1
+    return sum(k * (k - 1) for k in counts) / (n * (n - 1))
+
+
+class NgramScorer(object):
+    # Mean log-probability of the overlapping n-grams of a text, with the
+    # probabilities estimated from a sample corpus. Unseen n-grams get the
+    # probability of a single count.
+    def __init__(self, corpus, n=2):
+        corpus = sanitize(corpus)
+        self.n = n
+        counts = {}
+        for i in range(len(corpus) - n + 1):
+            gram = corpus[i:i + n]
+            counts[gram] = counts.get(gram, 0) + 1
+        total = max(1, sum(counts.values()))
+        self.logs = {gram: log(k / total) for (gram, k) in counts.items()}
+        self.floor = log(0.1 / total)
+
+    def __call__(self, text):
+        n = self.n
+        grams = len(text) - n + 1
+        if grams < 1:
+            return float('-inf')
+        logs, floor = self.logs, self.floor
+        text = bytes(text)
+        return sum(logs.get(text[i:i + n], floor) for i in range(grams)) / grams
+
+
+# order holds indices into the rotors given to search, as (r1, r2, r3).
+Candidate = namedtuple('Candidate', 'score plaintext order offsets rings')
+
+
+def _search_config(job):
+    # Sweeps every start position for one rotor order and set of ring
+    # offsets, decrypting straight out of the compiled permutation table.
+    order, wirings, reflector, rings, ciphertext, scorer, top, threshold = job
+    rotors = [Rotor(wiring, notch, 0, ring) for ((wiring, notch), ring) in zip(wirings, rings)]
+    enigma = Enigma(rotors[0], rotors[1], rotors[2], Rotor(reflector), cache=PermutationCache(0))
+    table = enigma.compile()
+    n2, n3 = rotors[1]._notchIndex, rotors[2]._notchIndex
+    out = bytearray(len(ciphertext))
+    best = []
+    for start in range(26 ** 3):
+        o1, o2, o3 = start // 676, start // 26 % 26, start % 26
+        for (idx, char) in enumerate(ciphertext):
+            o3 = (o3 + 1) % 26
+            if o3 == n3:
+                o2 = (o2 + 1) % 26
+            if o2 == n2:
+                o1 = (o1 + 1) % 26
+            out[idx] = table[((o1 * 26 + o2) * 26 + o3) * 26 + char - 65]
+
+        score = scorer(out)
+        if len(best) < top or score > best[0][0]:
+            candidate = Candidate(score, out.decode('ascii'), order,
+                                  (start // 676, start // 26 % 26, start % 26), tuple(rings))
+            if len(best) < top:
+                heapq.heappush(best, candidate)
+            else:
+                heapq.heapreplace(best, candidate)
+        if threshold is not None and score >= threshold:
+            return best, True
+    return best, False
+
+
+def search(ciphertext, rotors, reflector, ringOffsets=((0, 0, 0),), scorer=english_score,
+           top=10, threshold=None, processes=None):
+    # Tries every ordering of three of the given rotors, every start position
+    # and every ring offset triple in ringOffsets, one (order, rings) pair per
+    # pool task. Ring settings are not swept on their own: only the triples
+    # listed in ringOffsets are tried, (0, 0, 0) by default, so the caller
+    # must list every ring setting to consider. Keeps the `top` best scoring
+    # candidates (at least one), best first, and stops as soon as any
+    # candidate scores at least `threshold`. scorer gets the candidate
+    # plaintext as ASCII bytes and must be picklable.
+    if top < 1:
+        raise ValueError('top must be at least 1')
+    ciphertext = sanitize(ciphertext)
+    jobs = (
+        (order, tuple((rotors[i].wiring, rotors[i].notch) for i in order), reflector.wiring,
+         rings, ciphertext, scorer, top, threshold)
+        for order in permutations(range(len(rotors)), 3)
+        for rings in ringOffsets
+    )
+    best = []
+    with Pool(processes or cpu_count()) as pool:
+        for (candidates, done) in pool.imap_unordered(_search_config, jobs):
+            for candidate in candidates:
+                if len(best) < top:
+                    heapq.heappush(best, candidate)
+                elif candidate > best[0]:
+                    heapq.heapreplace(best, candidate)
+            if done:
+                pool.terminate()
+                break
+
+    return sorted(best, reverse=True)
+
+
+def _step(state, n2, n3):
+    # One key press of the scalar path in translate, for checking.
+    o1, o2, o3 = state
+    o3 = (o3 + 1) % 26
+    if o3 == n3:
+        o2 = (o2 + 1) % 26
+    if o2 == n2:
+        o1 = (o1 + 1) % 26
+    return (o1, o2, o3)
+
+
+def self_check(trials=100, seed=0):
+    # Checks the closed-form state_at against stepping one key at a time, and
+    # translate_batch against translate, over random rotor orders, notches
+    # (including none), start offsets and message lengths, so the
+    # double-step arithmetic and the vectorized path can't drift from the
+    # scalar one unnoticed. Raises AssertionError on the first mismatch and
+    # returns the number of cases checked otherwise.
+    import random
+    rng = random.Random(seed)
+    alphabet = Rotor('A')._ALPHABET
+    wirings = [r.wiring for r in (r1, r2, r3)]
+    checked = 0
+    for _ in range(trials):
+        rotors = [Rotor(rng.choice(wirings), rng.choice([None] + list(alphabet)),
+                        rng.randrange(26), rng.randrange(26)) for _ in range(3)]
+        # Start right before or on a notch now and then, to hit the wraparounds
+        for rotor in rng.sample(rotors, rng.randrange(3)):
+            if rotor.notch is not None:
+                rotor.offset = (rotor._notchIndex - rng.randrange(2)) % 26
+        enigma = Enigma(rotors[0], rotors[1], rotors[2], reflectorb, cache=PermutationCache())
+        start = (rotors[0].offset, rotors[1].offset, rotors[2].offset)
+        n2, n3 = rotors[1]._notchIndex, rotors[2]._notchIndex
+
+        state = start
+        stops = sorted(rng.sample(range(2 * 26 ** 2), 10) + [0, 1, 25, 26, 27, 26 ** 2, 2 * 26 ** 2 + 1])
+        k = 0
+        for stop in stops:
+            while k < stop:
+                state = _step(state, n2, n3)
+                k += 1
+            assert enigma.state_at(stop) == state, (start, n2, n3, stop)
+            checked += 1
+
+        if np is not None:
+            messages = [''.join(rng.choice(alphabet + 'abc .,') for _ in range(rng.randrange(2000)))
+                        for _ in range(rng.randrange(1, 4))]
+            expected = [enigma.translate(m) for m in messages]
+            after = (rotors[0].offset, rotors[1].offset, rotors[2].offset)
+            rotors[0].offset, rotors[1].offset, rotors[2].offset = start
+            assert enigma.translate_batch(messages, blockSize=rng.choice((1, 7, 26, 1 << 18))) == expected, start
+            assert (rotors[0].offset, rotors[1].offset, rotors[2].offset) == after, start
+            checked += 1
+    return checked
 
-        return ''.join(out)
 
 # br1 = 'EKMFLGDQVZNTOWYHXUSPAIBRCJ'
 # r1 = str.maketrans(alphabet, br1)
@@ -92,9 +590,12 @@ reflectorb = Rotor('YRUHQSLDPXNGOKMIEBFZCWVJAT')
 
 e = Enigma(r1, r2, r3, reflectorb)
 
-# m = e.translate('Hello. I am the best and stuff, so yeah.')
-m = e.translate('ILBDALCNHNNFLNUCMMRSTCDPRLXHR')
+# Guarded so that pool workers importing this module don't run the demo.
+if __name__ == '__main__':
+    # m = e.translate('Hello. I am the best and stuff, so yeah.')
+    m = e.translate('ILBDALCNHNNFLNUCMMRSTCDPRLXHR')
 
-print(m)
+    print(m)
+    print('self_check: %d cases ok' % self_check())
 
 # e = Enigma(enigma.r1, enigma.r2, enigma.r3, enigma.reflectorb)
@@ -0,0 +1,149 @@
+"""Este módulo genera muchos sudokus a la vez, repartiendo el trabajo entre
+varios procesos, de forma reproducible.
+
+Cada sudoku usa su propio generador de números aleatorios, con una semilla
+que se deriva de una semilla maestra y del índice del sudoku. Así, cualquier
+sudoku de la colección se puede volver a generar por sí solo con
+regenerate, sin generar los anteriores.
+
+Los sudokus se escriben en un archivo binario, un registro tras otro. Cada
+registro tiene un encabezado (índice, semilla, grado y dificultad), el
+tablero (ver Board) y la solución, un byte por celda."""
+
+import hashlib
+import random
+import struct
+from itertools import product
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+from .board import Board
+from .stats import GenerationStats
+from .sudoku import Sudoku
+
+# Índice, semilla, grado y dificultad
+_HEADER = struct.Struct('<IQBf')
+
+
+def puzzle_seed(master_seed, index):
+    """Retorna la semilla del sudoku número index de la colección."""
+    digest = hashlib.sha256(b'%d:%d' % (master_seed, index)).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def _combinations(grades, difficulties):
+    return list(product(grades, difficulties))
+
+
+def _generate(job):
+    """Genera un sudoku. Retorna el registro listo para escribir."""
+    (index, seed, grade, difficulty, unique, solver, method, hooks) = job
+    sudoku = Sudoku(grade, difficulty, solver=solver, rng=random.Random(seed))
+    if hooks:
+        # Con el índice y la semilla, un sudoku lento se puede volver a
+        # generar por sí solo con regenerate
+        sudoku.stats = GenerationStats(hooks, context={'index': index, 'seed': seed})
+    sudoku.generate_sudoku(unique, method)
+    return _HEADER.pack(index, seed, grade, sudoku.difficulty) \
+        + sudoku.board.to_bytes() + bytes(sudoku.solution)
+
+
+def _jobs(count, grades, difficulties, master_seed, unique, solver, method, hooks=(), start=0):
+    # Los grados y dificultades se reparten en orden entre los índices
+    combinations = _combinations(grades, difficulties)
+    for index in range(start, start + count):
+        (grade, difficulty) = combinations[index % len(combinations)]
+        yield (index, puzzle_seed(master_seed, index), grade, difficulty, unique, solver, method,
+               tuple(hooks))
+
+
+def generate_pool(dst, count, grades=(3,), difficulties=(0.5,), master_seed=0,
+                  processes=None, unique=True, solver='propagation', method='search',
+                  chunk_size=64, hooks=()):
+    """Genera count sudokus y los escribe en dst, en orden de índice.
+
+    Argumentos:
+    dst: archivo binario donde escribir los registros.
+    count: cantidad de sudokus.
+    grades: grados a generar; se reparten en orden entre los índices.
+    difficulties: dificultades (0 a 1, ver Sudoku) a generar, igual que los
+    grados. El índice i usa la combinación i % (len(grades)*len(difficulties)).
+    master_seed: semilla de la que se derivan las de cada sudoku.
+    processes: cantidad de procesos; por default uno por núcleo. Con 1 no
+    se crea ningún proceso.
+    unique: si es verdadero, los sudokus tienen una única solución.
+    solver: motor para resolver el tablero al generar (ver solver.py).
+    method: cómo obtener cada tablero resuelto (ver Sudoku.generate_sudoku).
+    chunk_size: cuántos sudokus mandar a cada proceso a la vez.
+    hooks: funciones que reciben las estadísticas de la generación de cada
+    sudoku (ver GenerationStats), con su índice y su semilla. Se llaman en
+    el proceso que genera el sudoku, así que con varios procesos deben
+    poder mandarse con pickle (funciones definidas a nivel de módulo). Sin
+    hooks no se cuenta nada.
+
+    El resultado no depende de processes ni de chunk_size. Retorna un
+    diccionario con la cantidad de sudokus, el tiempo total, sudokus por
+    segundo y bytes escritos."""
+    processes = processes or cpu_count()
+    start = perf_counter()
+    written = 0
+    jobs = _jobs(count, grades, difficulties, master_seed, unique, solver, method, hooks)
+    if processes == 1:
+        for job in jobs:
+            written += dst.write(_generate(job))
+    else:
+        with Pool(processes) as pool:
+            for record in pool.imap(_generate, jobs, chunk_size):
+                written += dst.write(record)
+    elapsed = perf_counter() - start
+    return {
+        'puzzles': count,
+        'elapsed': elapsed,
+        'puzzles_per_sec': count / elapsed if elapsed else 0.0,
+        'bytes': written,
+    }
+
+
+def regenerate(index, grades=(3,), difficulties=(0.5,), master_seed=0,
+               unique=True, solver='propagation', method='search', hooks=()):
+    """Vuelve a generar el sudoku número index de una colección creada con
+    generate_pool con los mismos argumentos. Retorna el registro leído como
+    en read_pool. Con hooks, se les mandan las estadísticas como en
+    generate_pool, por ejemplo para estudiar un sudoku que tardó mucho."""
+    job = next(_jobs(1, grades, difficulties, master_seed, unique, solver, method, hooks,
+                     start=index))
+    return _parse(_generate(job))
+
+
+def _parse(record):
+    (index, seed, grade, difficulty) = _HEADER.unpack_from(record)
+    offset = _HEADER.size
+    nbytes = Board.nbytes(grade)
+    board = Board(grade, bytearray(record[offset:offset + nbytes]))
+    solution = list(record[offset + nbytes:offset + nbytes + grade**4])
+    return {
+        'index': index,
+        'seed': seed,
+        'grade': grade,
+        'difficulty': difficulty,
+        'board': board,
+        'solution': solution,
+    }
+
+
+def read_pool(src):
+    """Lee los registros de un archivo binario escrito por generate_pool.
+    Genera un diccionario por sudoku con su índice, semilla, grado,
+    dificultad, tablero (Board) y solución (lista plana)."""
+    while True:
+        header = src.read(_HEADER.size)
+        if not header:
+            return
+        if len(header) < _HEADER.size:
+            raise ValueError('Registro incompleto.')
+        grade = _HEADER.unpack(header)[2]
+        size = Board.nbytes(grade) + grade**4
+        body = src.read(size)
+        if len(body) < size:
+            raise ValueError('Registro incompleto.')
+        yield _parse(header + body)
@@ -0,0 +1,939 @@
+"""Este módulo contiene motores para resolver tableros de Sudoku, como
+alternativa a Sudoku.recursive_solve.
+
+Los motores trabajan sobre una lista plana de size*size números, donde la
+celda (col, row) está en el índice row*size + col y 0 es una celda vacía."""
+
+from itertools import compress
+from time import perf_counter
+
+
+class SolverStats():
+    """Estadísticas de la última búsqueda de un motor."""
+    def __init__(self):
+        # Números intentados durante la búsqueda (nodos del árbol)
+        self.nodes = 0
+        # Veces que se tuvo que regresar porque ningún número servía
+        self.backtracks = 0
+        # Celdas llenadas por propagación (singles), sin adivinar
+        self.propagated = 0
+        # Veces que se empezó de nuevo la búsqueda en otro orden
+        self.restarts = 0
+        # Tiempo total, en segundos
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        """Retorna las estadísticas como un diccionario."""
+        return dict(vars(self))
+
+    def __repr__(self):
+        fields = ', '.join(f'{k}={v}' for k, v in self.as_dict().items())
+        return f'SolverStats({fields})'
+
+
+class Layout():
+    """Índices precalculados de las unidades de un tablero de cierto grado.
+    Las unidades son primero las filas, luego las columnas y al final los
+    subcuadrados, igual que en Sudoku.masks."""
+    _cache = {}
+
+    def __init__(self, grade):
+        self.grade = grade
+        self.size = grade**2
+        size = self.size
+        self.full_mask = ((1 << size) - 1) << 1
+        # Las tres unidades de cada celda
+        self.cell_units = []
+        for idx in range(size**2):
+            (col, row) = (idx % size, idx // size)
+            box = row//grade*grade + col//grade
+            self.cell_units.append((row, size + col, 2*size + box))
+        # Las celdas de cada unidad
+        self.units = [[] for _ in range(3*size)]
+        for (idx, units) in enumerate(self.cell_units):
+            for unit in units:
+                self.units[unit].append(idx)
+        # Las otras celdas de las unidades de cada celda
+        self.peers = [
+            tuple(sorted({j for unit in units for j in self.units[unit]} - {idx}))
+            for (idx, units) in enumerate(self.cell_units)
+        ]
+        # Después de las posibilidades de las celdas, PropagationSolver
+        # guarda en la misma lista en cuántas celdas de cada unidad cabe cada
+        # número: el de la unidad u y el número n está en la posición
+        # size² + u*(size+1) + n. Éstas son las posiciones base de las
+        # unidades de cada celda, y las celdas de la unidad de cada posición.
+        self.cell_places = [
+            tuple(size**2 + unit*(size+1) for unit in units) for units in self.cell_units
+        ]
+        self.place_units = [None] * size**2
+        for unit_cells in self.units:
+            self.place_units.extend([tuple(unit_cells)] * (size+1))
+
+    @classmethod
+    def get(cls, grade):
+        """Retorna la distribución del grado especificado, creándola sólo una vez."""
+        if grade not in cls._cache:
+            cls._cache[grade] = Layout(grade)
+        return cls._cache[grade]
+
+
+class Solver():
+    """Motor base. Las subclases implementan _solve."""
+    name = None
+
+    def __init__(self):
+        self.stats = SolverStats()
+
+    def solve(self, grade, cells):
+        """Resuelve el tablero dado como lista plana. Retorna una lista nueva
+        con la solución, o None si el tablero no tiene solución."""
+        self.stats = SolverStats()
+        start = perf_counter()
+        try:
+            return self._solve(Layout.get(grade), list(cells))
+        finally:
+            self.stats.elapsed = perf_counter() - start
+
+    def _solve(self, layout, cells):
+        raise NotImplementedError
+
+
+# Lugares de un número ya colocado en una unidad (ver
+# PropagationSolver._candidates): más de los que puede haber
+_SOLVED = 1 << 20
+
+
+class _Restart(Exception):
+    """Interrumpe una búsqueda para empezar de nuevo (ver PropagationSolver)."""
+
+
+class PropagationSolver(Solver):
+    """Búsqueda que escoge siempre dónde adivinar con menos opciones (MRV) y
+    que, después de cada número colocado, llena todos los 'singles':
+    celdas con una sola posibilidad (naked singles) y números que sólo
+    caben en una celda de alguna unidad (hidden singles). Si no hay
+    singles, descarta posibilidades con candidatos bloqueados.
+
+    Las posibilidades de cada celda se copian al adivinar, así que lo que se
+    descarta en una rama se conserva en todas sus sub-ramas.
+
+    Con tableros de muchas soluciones, un mal número al principio puede
+    dejar a la búsqueda atorada en una rama enorme sin solución. Por eso,
+    cada restart_nodes números intentados (el doble en cada vez) se empieza
+    de nuevo probando las opciones en otro orden. Contar soluciones siempre
+    recorre todo el árbol, sin reinicios."""
+    name = 'propagation'
+    # Números a intentar antes del primer reinicio, o None para nunca reiniciar
+    restart_nodes = 2000
+    # Cuántas posiciones se rotan las opciones al adivinar (una por
+    # reinicio), y cuántos números se pueden intentar antes de reiniciar
+    _rotation = 0
+    _limit = None
+
+    def _solve(self, layout, cells):
+        masks = self._masks(layout, cells)
+        state = None if masks is None else self._candidates(layout, cells, masks)
+        if state is not None and self._find(layout, cells, masks, *state):
+            return cells
+        return None
+
+    def _find(self, layout, cells, masks, cand, queue):
+        """Busca una solución a partir del estado dado, reiniciando la
+        búsqueda cuando se atora. Retorna verdadero y deja el tablero
+        resuelto si la encuentra; si no, lo deja como estaba."""
+        saved = (list(cells), list(masks))
+        budget = self.restart_nodes
+        try:
+            while True:
+                self._limit = None if budget is None else self.stats.nodes + budget
+                try:
+                    return self._search(layout, cells, masks, list(cand), list(queue))
+                except _Restart:
+                    (cells[:], masks[:]) = saved
+                    self._rotation += 1
+                    self.stats.restarts += 1
+                    budget *= 2
+        finally:
+            self._limit = None
+            self._rotation = 0
+
+    def _order(self, options):
+        """Retorna las opciones en el orden en que se prueban."""
+        k = self._rotation % len(options)
+        return options[k:] + options[:k]
+
+    def _masks(self, layout, cells):
+        """Calcula las máscaras de las unidades, o None si los números dados
+        ya rompen las reglas."""
+        masks = [0] * len(layout.units)
+        for (idx, n) in enumerate(cells):
+            if n:
+                bit = 1 << n
+                for unit in layout.cell_units[idx]:
+                    if masks[unit] & bit:
+                        return None
+                    masks[unit] |= bit
+        return masks
+
+    def _candidates(self, layout, cells, masks):
+        """Retorna las posibilidades de cada celda (0 en las llenas), seguidas
+        de en cuántas celdas de cada unidad cabe cada número (ver
+        Layout.cell_places; _SOLVED si ya está colocado), y los singles por
+        colocar, como (celda, bit del número). En la cola también van, como
+        (posición del número en la unidad, bit), los números que hay que
+        revisar por candidatos bloqueados (ver _locked). None si alguna
+        celda vacía o algún número de una unidad ya no tiene lugar."""
+        full = layout.full_mask
+        cell_units = layout.cell_units
+        size = layout.size
+        cand = [0] * len(cells) + [_SOLVED] * (len(layout.units) * (size+1))
+        queue = []
+        for (idx, n) in enumerate(cells):
+            if not n:
+                (r, c, b) = cell_units[idx]
+                x = full & ~(masks[r] | masks[c] | masks[b])
+                if not x:
+                    return None
+                cand[idx] = x
+                if not x & (x - 1):
+                    queue.append((idx, x))
+        for (unit, unit_cells) in enumerate(layout.units):
+            base = len(cells) + unit*(size+1)
+            for n in range(1, size+1):
+                bit = 1 << n
+                if masks[unit] & bit:
+                    continue
+                places = [idx for idx in unit_cells if cand[idx] & bit]
+                if not places:
+                    return None
+                cand[base + n] = len(places)
+                if len(places) == 1:
+                    queue.append((places[0], bit))
+                elif len(places) <= layout.grade:
+                    queue.append((base + n, bit))
+        return (cand, queue)
+
+    def _exclude(self, layout, cand, idx, removed, queue):
+        """Quita los bits de removed de las posibilidades de la celda vacía
+        idx, agregando a queue los singles que resulten. Retorna False si
+        hay una contradicción."""
+        x = cand[idx] & ~removed
+        if not x:
+            return False
+        removed &= cand[idx]
+        cand[idx] = x
+        if not x & (x - 1):
+            queue.append((idx, x))
+        return self._uncount(layout, cand, idx, removed, queue)
+
+    def _uncount(self, layout, cand, idx, removed, queue):
+        """Descuenta la celda idx de los lugares de los números de removed en
+        sus unidades. Si a uno le queda un solo lugar lo agrega a queue (un
+        hidden single), y si le quedan pocos, para revisar si están
+        bloqueados; si no le queda ninguno retorna False."""
+        place_units = layout.place_units
+        grade = layout.grade
+        while removed:
+            bit = removed & -removed
+            removed ^= bit
+            n = bit.bit_length() - 1
+            for base in layout.cell_places[idx]:
+                k = cand[base + n] - 1
+                cand[base + n] = k
+                if k == 1:
+                    for j in place_units[base]:
+                        if cand[j] & bit:
+                            queue.append((j, bit))
+                            break
+                elif not k:
+                    return False
+                elif k <= grade:
+                    queue.append((base + n, bit))
+        return True
+
+    def count_solutions(self, grade, cells, limit=2):
+        """Cuenta las soluciones del tablero, deteniéndose al llegar a limit.
+        Con el límite de 2 basta para saber si la solución es única."""
+        self.stats = SolverStats()
+        start = perf_counter()
+        layout = Layout.get(grade)
+        cells = list(cells)
+        masks = self._masks(layout, cells)
+        state = None if masks is None else self._candidates(layout, cells, masks)
+        try:
+            return 0 if state is None else self._count(layout, cells, masks, *state, limit)
+        finally:
+            self.stats.elapsed = perf_counter() - start
+
+    def _place(self, layout, cells, masks, idx, n):
+        cells[idx] = n
+        bit = 1 << n
+        for unit in layout.cell_units[idx]:
+            masks[unit] |= bit
+
+    def _undo(self, layout, cells, masks, trail):
+        for idx in reversed(trail):
+            clear = ~(1 << cells[idx])
+            for unit in layout.cell_units[idx]:
+                masks[unit] &= clear
+            cells[idx] = 0
+        del trail[:]
+
+    def _propagate(self, layout, cells, masks, cand, queue, trail):
+        """Coloca los singles de queue y todos los que resulten, anotando en
+        trail las celdas llenadas y quitando de cand lo que se descarte.
+        Cuando ya no hay singles, aplica candidatos bloqueados y vuelve a
+        buscarlos. Retorna None si se encontró una contradicción, o las
+        opciones (celda, número) entre las que hay que adivinar: las de la
+        celda o las del número en una unidad con menos posibilidades. Si ya
+        no hay celdas vacías retorna una lista vacía."""
+        peers = layout.peers
+        cell_places = layout.cell_places
+        place_units = layout.place_units
+        grade = layout.grade
+        ncells = len(cells)
+        locked = []
+        while True:
+            while queue:
+                (idx, bit) = queue.pop()
+                if idx >= ncells:
+                    # Se revisa después, cuando ya no haya singles
+                    locked.append((idx, bit))
+                    continue
+                n = cells[idx]
+                if n:
+                    # Ya se llenó por otro single; está bien sólo si fue
+                    # con el mismo número
+                    if 1 << n != bit:
+                        return None
+                    continue
+                x = cand[idx]
+                if not x & bit:
+                    # Otro single ocupó el único lugar posible
+                    return None
+                n = bit.bit_length() - 1
+                self._place(layout, cells, masks, idx, n)
+                trail.append(idx)
+                self.stats.propagated += 1
+                cand[idx] = 0
+                if x != bit and not self._uncount(layout, cand, idx, x ^ bit, queue):
+                    return None
+                for base in cell_places[idx]:
+                    cand[base + n] = _SOLVED
+                # Quitar el número de las otras celdas de sus unidades; esto
+                # también descuenta sus lugares, y así se encuentran los
+                # hidden singles sin revisar todas las unidades
+                for j in peers[idx]:
+                    x = cand[j]
+                    if x & bit:
+                        x ^= bit
+                        if not x:
+                            return None
+                        cand[j] = x
+                        if not x & (x - 1):
+                            queue.append((j, x))
+                        for base in cell_places[j]:
+                            k = cand[base + n] - 1
+                            cand[base + n] = k
+                            if k == 1:
+                                for i in place_units[base]:
+                                    if cand[i] & bit:
+                                        queue.append((i, bit))
+                                        break
+                            elif not k:
+                                return None
+                            elif k <= grade:
+                                queue.append((base + n, bit))
+            if not locked:
+                break
+            if not self._locked(layout, cand, locked, queue):
+                return None
+            locked = []
+        # Las celdas vacías nunca se quedan sin posibilidades, así que son
+        # las que tienen alguna
+        empty = list(compress(range(ncells), cand))
+        if not empty:
+            return []
+        return self._branch(layout, cand, empty)
+
+    def _locked(self, layout, cand, checks, queue):
+        """Candidatos bloqueados: si dentro de un cuadrado un número sólo cabe
+        en una fila (o columna), no puede ir en el resto de esa fila; y si
+        dentro de una fila (o columna) un número sólo cabe en un cuadrado,
+        no puede ir en el resto de ese cuadrado.
+
+        Sólo se revisan los números de checks, como (posición del número en
+        la unidad, bit), porque una unidad sólo puede quedar bloqueada
+        cuando su número pierde lugares. Quita las posibilidades descartadas
+        de cand y agrega a queue los singles que resulten. Retorna False si
+        hubo una contradicción."""
+        size = layout.size
+        ncells = size**2
+        cell_units = layout.cell_units
+        for (pos, bit) in checks:
+            k = cand[pos]
+            if k < 2 or k > layout.grade:
+                # Ya se colocó, o es un hidden single
+                continue
+            places = [idx for idx in layout.place_units[pos] if cand[idx] & bit]
+            unit = (pos - ncells) // (size+1)
+            if unit >= 2*size:
+                # Cuadrado -> fila o columna
+                for kind in (0, 1):
+                    line = cell_units[places[0]][kind]
+                    if all(cell_units[idx][kind] == line for idx in places):
+                        for idx in layout.units[line]:
+                            if cand[idx] & bit and cell_units[idx][2] != unit:
+                                if not self._exclude(layout, cand, idx, bit, queue):
+                                    return False
+            else:
+                # Fila o columna -> cuadrado
+                box = cell_units[places[0]][2]
+                if all(cell_units[idx][2] == box for idx in places):
+                    kind = 0 if unit < size else 1
+                    for idx in layout.units[box]:
+                        if cand[idx] & bit and cell_units[idx][kind] != unit:
+                            if not self._exclude(layout, cand, idx, bit, queue):
+                                return False
+        return True
+
+    def _branch(self, layout, cand, empty):
+        """Escoge dónde adivinar: la celda con menos posibilidades (MRV) o,
+        si hay uno con menos, el número de una unidad con menos celdas donde
+        cabe, igual que escoge el Algoritmo X. Retorna sus opciones.
+
+        Entre celdas empatadas se escoge la que tiene más vecinas vacías:
+        adivinarla descarta más, y en los 16x16 difíciles eso reduce los
+        nodos a la cuarta parte."""
+        best_count = layout.size + 1
+        for idx in empty:
+            count = bin(cand[idx]).count('1')
+            if count < best_count:
+                best_count, ties = count, [idx]
+            elif count == best_count:
+                ties.append(idx)
+        cells = len(layout.cell_units)
+        # Sin singles, ningún número de una unidad cabe en menos de 2 celdas
+        places = min(cand[cells:]) if best_count > 2 else best_count
+        if places >= best_count:
+            best = ties[0]
+            if len(ties) > 1:
+                peers = layout.peers
+                best = max(ties, key=lambda idx: sum(1 for i in peers[idx] if cand[i]))
+            options = []
+            x = cand[best]
+            while x:
+                bit = x & -x
+                x ^= bit
+                options.append((best, bit.bit_length() - 1))
+            return options
+        pos = cand.index(places, cells)
+        bit = 1 << (pos - cells) % (layout.size + 1)
+        n = bit.bit_length() - 1
+        return [(idx, n) for idx in layout.place_units[pos] if cand[idx] & bit]
+
+    def _search(self, layout, cells, masks, cand, queue):
+        trail = []
+        options = self._propagate(layout, cells, masks, cand, queue, trail)
+        if options is None:
+            self._undo(layout, cells, masks, trail)
+            return False
+        if not options:
+            return True
+        for (idx, n) in self._order(options):
+            self.stats.nodes += 1
+            if self._limit is not None and self.stats.nodes > self._limit:
+                raise _Restart()
+            if self._search(layout, cells, masks, list(cand), [(idx, 1 << n)]):
+                return True
+        self.stats.backtracks += 1
+        self._undo(layout, cells, masks, trail)
+        return False
+
+    def _count(self, layout, cells, masks, cand, queue, limit):
+        """Como _search, pero cuenta soluciones hasta limit, y siempre deja
+        el tablero como estaba."""
+        trail = []
+        options = self._propagate(layout, cells, masks, cand, queue, trail)
+        total = 0
+        if options is not None:
+            if not options:
+                total = 1
+            for (idx, n) in options:
+                if total >= limit:
+                    break
+                self.stats.nodes += 1
+                total += self._count(layout, cells, masks, list(cand), [(idx, 1 << n)], limit - total)
+        if not total:
+            self.stats.backtracks += 1
+        self._undo(layout, cells, masks, trail)
+        return total
+
+
+class UniquenessChecker():
+    """Quita celdas de un tablero resuelto, una por una, sólo si el tablero
+    sigue teniendo una única solución.
+
+    En lugar de contar soluciones desde cero cada vez, mantiene el tablero
+    y sus máscaras entre llamadas. Como la solución ya se conoce, quitar la
+    celda conserva la unicidad si y sólo si no hay ninguna solución con otro
+    número en esa celda, lo que se revisa con una sola búsqueda."""
+    def __init__(self, grade, solution):
+        self.layout = Layout.get(grade)
+        self.cells = list(solution)
+        self.solution = list(solution)
+        self.engine = PropagationSolver()
+        self.masks = self.engine._masks(self.layout, self.cells)
+        if self.masks is None or not all(self.cells):
+            raise ValueError('El tablero no está resuelto.')
+
+    def try_remove(self, idx):
+        """Vacía la celda idx si la solución sigue siendo única, retornando
+        verdadero si se pudo vaciar."""
+        layout, cells, masks, engine = self.layout, self.cells, self.masks, self.engine
+        n = cells[idx]
+        if not n:
+            return True
+        engine._undo(layout, cells, masks, [idx])
+        # Buscar una solución con cualquier otro número en la celda
+        (cand, queue) = engine._candidates(layout, cells, masks)
+        if not engine._exclude(layout, cand, idx, 1 << n, queue):
+            return True
+        saved = (list(cells), list(masks))
+        if engine._find(layout, cells, masks, cand, queue):
+            # Otra solución posible, hay que dejar la celda
+            (cells[:], masks[:]) = saved
+            engine._place(layout, cells, masks, idx, n)
+            return False
+        return True
+
+
+class ProgressEvent():
+    """Avance de IterativeSolver.steps."""
+    def __init__(self, changes, filled, stats, done=False, solved=False):
+        # Celdas que cambiaron desde el evento anterior, {índice: número}
+        self.changes = changes
+        # Cantidad de celdas llenas en este momento
+        self.filled = filled
+        # Estadísticas acumuladas de la búsqueda
+        self.stats = stats
+        # Si la búsqueda terminó, y si encontró una solución
+        self.done = done
+        self.solved = solved
+
+    def __repr__(self):
+        return (f'ProgressEvent(changes={len(self.changes)}, filled={self.filled}, '
+                f'done={self.done}, solved={self.solved})')
+
+
+class IterativeSolver(PropagationSolver):
+    """La misma búsqueda que PropagationSolver, pero con una pila explícita
+    en lugar de recursión, para que no haya límite de profundidad y se pueda
+    pausar en cualquier momento.
+
+    steps() es un generador de eventos de progreso: la búsqueda sólo avanza
+    mientras se le piden eventos, y los cambios se agrupan en lugar de
+    reportarse una celda a la vez."""
+    name = 'iterative'
+
+    def __init__(self):
+        super().__init__()
+        # Celdas que cambiaron desde el último evento, y cuántas están llenas.
+        # _steps los reinicia; fuera de steps (por ejemplo en
+        # count_solutions) sólo se llevan sin que nadie los lea.
+        self._changed = set()
+        self._filled = 0
+
+    def _place(self, layout, cells, masks, idx, n):
+        super()._place(layout, cells, masks, idx, n)
+        self._changed.add(idx)
+        self._filled += 1
+
+    def _undo(self, layout, cells, masks, trail):
+        self._changed.update(trail)
+        self._filled -= len(trail)
+        super()._undo(layout, cells, masks, trail)
+
+    def _solve(self, layout, cells):
+        for event in self._steps(layout, cells, None, None):
+            pass
+        return cells if event.solved else None
+
+    def steps(self, grade, cells, every=None, interval=None):
+        """Resuelve el tablero paso a paso, emitiendo un evento cada `every`
+        números intentados y/o cada `interval` segundos, y siempre un evento
+        final con done=True. Si no se especifica ninguno de los dos, sólo se
+        emite el evento final. El tablero resuelto queda en la lista cells."""
+        self.stats = SolverStats()
+        start = perf_counter()
+        try:
+            yield from self._steps(Layout.get(grade), cells, every, interval)
+        finally:
+            self.stats.elapsed = perf_counter() - start
+
+    def _event(self, cells, done=False, solved=False):
+        changes = {idx: cells[idx] for idx in self._changed}
+        self._changed = set()
+        return ProgressEvent(changes, self._filled, self.stats, done, solved)
+
+    def _steps(self, layout, cells, every, interval):
+        self._changed = set()
+        self._filled = sum(1 for n in cells if n)
+        masks = self._masks(layout, cells)
+        state = None if masks is None else self._candidates(layout, cells, masks)
+        if state is None:
+            yield self._event(cells, True, False)
+            return
+        (cand, queue) = state
+
+        throttled = every is not None or interval is not None
+        last_nodes = 0
+        last_time = perf_counter()
+        budget = self.restart_nodes
+        limit = None if budget is None else budget
+        self._rotation = 0
+        # Cada marco de la pila es [opciones (celda, número) entre las que se
+        # adivina, cuántas se han probado, celdas llenadas al probar la
+        # última (incluida ella), posibilidades antes de adivinar]
+        stack = []
+        trail = []
+        found = self._propagate(layout, cells, masks, cand, queue, trail)
+        while True:
+            if found is None:
+                # Contradicción: regresar al último marco con opciones por probar
+                while stack:
+                    frame = stack[-1]
+                    self._undo(layout, cells, masks, frame[2])
+                    if frame[1] < len(frame[0]):
+                        break
+                    stack.pop()
+                    self.stats.backtracks += 1
+                else:
+                    self._undo(layout, cells, masks, trail)
+                    yield self._event(cells, True, False)
+                    return
+            elif not found:
+                yield self._event(cells, True, True)
+                return
+            else:
+                frame = [self._order(found), 0, [], cand]
+                stack.append(frame)
+            (idx, n) = frame[0][frame[1]]
+            frame[1] += 1
+            self.stats.nodes += 1
+            if limit is not None and self.stats.nodes > limit:
+                # Empezar de nuevo con las opciones en otro orden
+                while stack:
+                    self._undo(layout, cells, masks, stack.pop()[2])
+                self._undo(layout, cells, masks, trail)
+                self._rotation += 1
+                self.stats.restarts += 1
+                budget *= 2
+                limit = self.stats.nodes + budget
+                (cand, queue) = self._candidates(layout, cells, masks)
+                found = self._propagate(layout, cells, masks, cand, queue, trail)
+                continue
+            cand = list(frame[3])
+            found = self._propagate(layout, cells, masks, cand, [(idx, 1 << n)], frame[2])
+
+            if throttled:
+                now = perf_counter()
+                if (every is not None and self.stats.nodes - last_nodes >= every) \
+                        or (interval is not None and now - last_time >= interval):
+                    last_nodes, last_time = self.stats.nodes, now
+                    yield self._event(cells)
+
+
+class ExactCoverSolver(Solver):
+    """Resuelve el Sudoku como un problema de cobertura exacta con el
+    Algoritmo X de Knuth, sobre listas doblemente enlazadas (Dancing
+    Links). Cada opción (celda, número) cubre cuatro restricciones: la
+    celda está llena, y el número aparece en su fila, en su columna y en su
+    cuadrado.
+
+    Los enlaces viven en listas de enteros: el nodo 0 es la raíz, los nodos
+    1 a 4*size² son los encabezados de las restricciones, y después vienen
+    los cuatro nodos de cada opción. La estructura vacía se construye una
+    sola vez por grado; cada búsqueda trabaja sobre una copia.
+
+    Cuando ninguna restricción tiene una sola opción, se descartan las
+    opciones que quedan fuera de otra restricción (ver _reduce) antes de
+    adivinar, y la búsqueda se reinicia como en PropagationSolver."""
+    name = 'exact_cover'
+    _templates = {}
+    # Opciones a intentar antes del primer reinicio, o None para nunca
+    # reiniciar (ver PropagationSolver). Son más que en PropagationSolver
+    # porque aquí también cuentan las opciones forzadas.
+    restart_nodes = 30000
+    _rotation = 0
+    _limit = None
+
+    def _template(self, layout):
+        """Retorna los enlaces (izquierda, derecha, arriba, abajo, restricción
+        de cada nodo y tamaño de cada restricción) del grado dado, y las
+        restricciones que cubre la opción de cada nodo."""
+        if layout.grade not in self._templates:
+            size = layout.size
+            columns = 4 * size**2
+            left = [columns] + list(range(columns))
+            right = list(range(1, columns + 1)) + [0]
+            up = list(range(columns + 1))
+            down = list(range(columns + 1))
+            column = list(range(columns + 1))
+            covers = [None] * (columns + 1)
+            for (idx, units) in enumerate(layout.cell_units):
+                for n in range(1, size+1):
+                    first = len(column)
+                    covered = [idx + 1] + [size**2 + unit*size + n for unit in units]
+                    covers.extend([frozenset(covered)] * 4)
+                    for (k, c) in enumerate(covered):
+                        node = first + k
+                        left.append(first + (k - 1) % 4)
+                        right.append(first + (k + 1) % 4)
+                        # Se agrega al final de la columna
+                        up.append(up[c])
+                        down.append(c)
+                        down[up[c]] = node
+                        up[c] = node
+                        column.append(c)
+            sizes = [0] + [size] * columns
+            self._templates[layout.grade] = (left, right, up, down, column, sizes, covers)
+        return self._templates[layout.grade]
+
+    def _solve(self, layout, cells):
+        size = layout.size
+        first = 4*size**2 + 1
+        budget = self.restart_nodes
+        try:
+            while True:
+                if not self._start(layout, cells):
+                    return None
+                chosen = []
+                self._limit = None if budget is None else self.stats.nodes + budget
+                try:
+                    if not self._search(chosen):
+                        return None
+                    break
+                except _Restart:
+                    # Se empieza de nuevo desde los números dados, probando
+                    # las opciones en otro orden y con más nodos
+                    self._rotation += 1
+                    self.stats.restarts += 1
+                    budget *= 2
+        finally:
+            self._limit = None
+            self._rotation = 0
+        for row in chosen:
+            option = (row - first) // 4
+            cells[option // size] = option % size + 1
+        return cells
+
+    def _start(self, layout, cells):
+        """Copia los enlaces vacíos y cubre las restricciones de los números
+        dados. Retorna False si los números dados chocan."""
+        size = layout.size
+        (left, right, up, down, column, sizes, covers) = self._template(layout)
+        self._links = (list(left), list(right), list(up), list(down), column, list(sizes))
+        self._covers = covers
+        self._grade = layout.grade
+        self._peers = layout.peers
+        (left, right) = self._links[:2]
+        first = 4*size**2 + 1
+        for (idx, n) in enumerate(cells):
+            if n:
+                # Los nodos de la opción (idx, n)
+                row = first + 4*(idx*size + n - 1)
+                for node in range(row, row + 4):
+                    c = column[node]
+                    if right[left[c]] != c:
+                        # La restricción ya está cubierta, los números dados chocan
+                        return False
+                for node in range(row, row + 4):
+                    self._cover(column[node])
+        return True
+
+    _order = PropagationSolver._order
+
+    def _search(self, chosen):
+        (left, right, up, down, column, sizes) = self._links
+        if not right[0]:
+            return True
+        hidden = []
+        while True:
+            # La restricción con menos opciones primero
+            c = right[0]
+            best_size = sizes[c] + 1
+            while c:
+                if sizes[c] < best_size:
+                    best_size, ties = sizes[c], [c]
+                    if best_size < 2:
+                        break
+                elif sizes[c] == best_size:
+                    ties.append(c)
+                c = right[c]
+            if best_size < 2 or not self._reduce(hidden):
+                break
+        best = ties[0]
+        cells = self._grade**4
+        if best_size and len(ties) > 1 and best <= cells:
+            # Entre celdas empatadas, la con más vecinas vacías, como en
+            # PropagationSolver. La celda idx es la restricción idx + 1, y
+            # está vacía mientras la restricción no esté cubierta.
+            peers = self._peers
+            best = max((c for c in ties if c <= cells), key=lambda c: sum(
+                1 for i in peers[c - 1] if right[left[i + 1]] == i + 1))
+        if best_size:
+            self._cover(best)
+            rows = []
+            row = down[best]
+            while row != best:
+                rows.append(row)
+                row = down[row]
+            for row in self._order(rows):
+                self.stats.nodes += 1
+                if self._limit is not None and self.stats.nodes > self._limit:
+                    raise _Restart()
+                chosen.append(row)
+                node = right[row]
+                while node != row:
+                    self._cover(column[node])
+                    node = right[node]
+                if self._search(chosen):
+                    return True
+                node = left[row]
+                while node != row:
+                    self._uncover(column[node])
+                    node = left[node]
+                chosen.pop()
+            self._uncover(best)
+        for row in reversed(hidden):
+            node = left[row]
+            while True:
+                sizes[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                if node == row:
+                    break
+                node = left[node]
+        self.stats.backtracks += 1
+        return False
+
+    def _reduce(self, hidden):
+        """Si todas las opciones de una restricción c cubren también otra
+        restricción b, las demás opciones de b son imposibles: cubrir c
+        cubre b. Así se descartan, entre otros, los candidatos bloqueados.
+        Quita esas opciones de la estructura y las agrega a hidden, para
+        devolverlas después. Retorna verdadero si quitó alguna."""
+        (left, right, up, down, column, sizes) = self._links
+        covers = self._covers
+        (grade, cells) = (self._grade, self._grade**4)
+        found = False
+        c = right[0]
+        while c:
+            # Sólo se revisan las restricciones de las unidades (las opciones
+            # de una celda no comparten nada más) con a lo más grade
+            # opciones, las que pueden caber en un segmento de fila o columna
+            if c > cells and 1 < sizes[c] <= grade:
+                # Las restricciones que cubren todas las opciones de c. Casi
+                # siempre la primera y la última ya sólo comparten c.
+                shared = covers[down[c]] & covers[up[c]]
+                row = down[down[c]]
+                while len(shared) > 1 and row != up[c]:
+                    shared = shared & covers[row]
+                    row = down[row]
+                for b in shared:
+                    if sizes[b] == sizes[c]:
+                        continue
+                    row = down[b]
+                    while row != b:
+                        if c not in covers[row]:
+                            # La opción no cubre c, se quita
+                            hidden.append(row)
+                            node = row
+                            while True:
+                                down[up[node]] = down[node]
+                                up[down[node]] = up[node]
+                                sizes[column[node]] -= 1
+                                node = right[node]
+                                if node == row:
+                                    break
+                            found = True
+                        row = down[row]
+            c = right[c]
+        return found
+
+    def _cover(self, c):
+        (left, right, up, down, column, sizes) = self._links
+        right[left[c]] = right[c]
+        left[right[c]] = left[c]
+        row = down[c]
+        while row != c:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                sizes[column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def _uncover(self, c):
+        (left, right, up, down, column, sizes) = self._links
+        row = up[c]
+        while row != c:
+            node = left[row]
+            while node != row:
+                sizes[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[c]] = c
+        left[right[c]] = c
+
+
+# Motores disponibles por nombre
+SOLVERS = {
+    PropagationSolver.name: PropagationSolver,
+    ExactCoverSolver.name: ExactCoverSolver,
+    IterativeSolver.name: IterativeSolver,
+}
+
+
+def get_solver(solver):
+    """Retorna un motor a partir de su nombre, o el mismo motor si ya es una
+    instancia."""
+    if isinstance(solver, str):
+        if solver not in SOLVERS:
+            raise ValueError(f'Motor desconocido: {solver}')
+        return SOLVERS[solver]()
+    return solver
+
+
+# Las semillas 11, 12, 30, 35 y 46 dan los 16x16 de solución única que
+# más tardaban antes de desempatar por vecinas vacías
+def main(seeds=(0, 1, 2, 11, 12, 30, 35, 46)):
+    """Función de prueba: mide cuánto tarda cada motor en resolver sudokus
+    de 16x16 generados con cada semilla, con una sola solución (dificultad
+    0.5) y con varias (dificultades 0.5 a 0.7), y marca los que pasan de
+    medio segundo."""
+    from random import Random
+    from .sudoku import Sudoku
+    boards = []
+    for seed in seeds:
+        sud = Sudoku(4, 0.5, rng=Random(seed))
+        sud.generate_sudoku(unique=True, method='transform')
+        boards.append((f'única {seed}', sud.board.cells()))
+        for difficulty in (0.5, 0.6, 0.7):
+            sud = Sudoku(4, difficulty, rng=Random(seed))
+            sud.generate_sudoku(method='transform')
+            boards.append((f'd{difficulty} {seed}', sud.board.cells()))
+    for (name, cls) in SOLVERS.items():
+        for (board, cells) in boards:
+            engine = cls()
+            assert engine.solve(4, cells) is not None
+            slow = '  (más de medio segundo)' if engine.stats.elapsed > 0.5 else ''
+            print(f'{name:12} {board:8} {engine.stats.elapsed:7.3f} s  {engine.stats.nodes:6} nodos{slow}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Este módulo contiene GenerationStats, las estadísticas opcionales de un
+Sudoku: contadores de la búsqueda, tiempo de cada fase de la generación y
+funciones (hooks) a las que se mandan para exportarlas."""
+
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class GenerationStats():
+    """Estadísticas de la última generación (o de las búsquedas desde el
+    último reset). Se activan asignándolas a Sudoku.stats; mientras un
+    Sudoku no tenga estadísticas, no se cuenta nada.
+
+    Cada hook es una función que recibe un diccionario (ver as_dict) cada
+    vez que se llama a emit, por ejemplo al terminar generate_sudoku. El
+    diccionario incluye también context, los datos que quien genera el
+    sudoku quiera agregar para reconocerlo, como su semilla y su índice
+    (ver generate.py)."""
+    def __init__(self, hooks=(), context=None):
+        self.hooks = list(hooks)
+        self.context = dict(context or {})
+        self.reset()
+
+    def reset(self):
+        """Pone todos los contadores y tiempos en cero."""
+        # Llamadas a recursive_solve (celdas visitadas)
+        self.nodes = 0
+        # Llamadas a recursive_solve en las que ningún número sirvió
+        self.backtracks = 0
+        # Llamadas a check_safe
+        self.check_safe_calls = 0
+        # Profundidad actual y máxima de recursive_solve
+        self.depth = 0
+        self.max_depth = 0
+        # Segundos en cada fase, por nombre
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el tiempo del bloque with y lo suma a la fase name."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    def add_hook(self, hook):
+        """Agrega una función que recibirá las estadísticas en cada emit."""
+        self.hooks.append(hook)
+
+    def as_dict(self):
+        """Retorna las estadísticas como un diccionario."""
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'check_safe_calls': self.check_safe_calls,
+            'max_depth': self.max_depth,
+            'phases': dict(self.phases),
+        }
+
+    def emit(self, **extra):
+        """Manda las estadísticas, junto con context y los datos extra, a
+        cada hook."""
+        data = self.as_dict()
+        data.update(self.context)
+        data.update(extra)
+        for hook in self.hooks:
+            hook(data)
+
+    def __repr__(self):
+        fields = ', '.join(f'{k}={v}' for k, v in self.as_dict().items())
+        return f'GenerationStats({fields})'
@@ -1,25 +1,67 @@
 """Este módulo contiene la clase Sudoku, para configurar e interactuar con un tablero Sudoku."""
 
-from random import normalvariate, shuffle
-from time import sleep
+import random
+from array import array
+from contextlib import nullcontext
+from time import perf_counter, sleep
 
+from .board import Board, GridView
 from .characters import CHAR_FONTS, SUDOKU_FONTS
+from .solver import IterativeSolver, Layout, PropagationSolver, UniquenessChecker, get_solver
 from .utils import interpolate
 
+# Cuadrículas vacías ya construidas, por (grado, fuente)
+_FRAMES = {}
+
+# Tableros resueltos de los que se derivan otros con transformaciones, por grado
+_SEED_GRIDS = {}
+
+# El número que representa cada caracter de CHAR_FONTS['alpha'], para leer
+# tableros sin tener que buscar cada caracter en la fuente. '.' es vacío.
+CHAR_VALUES = {c: n for (n, c) in reversed(list(enumerate(CHAR_FONTS['alpha'])))}
+CHAR_VALUES['.'] = 0
+
 class Sudoku():
     """Tablero de Sudoku."""
-    def __init__(self, grade=3, difficulty=0, callback=None):
+    def __init__(self, grade=3, difficulty=0, callback=None, solver=None, rng=None,
+                 stats=None):
         # 'nivel' del sudoku. Entre más alto, más grande y difícil el Sudoku.
         self.grade = grade
         # Tamaño total del sudoku, en celdas.
         self.size = self.grade**2
-        # Contenido del sudoku, una matriz del tamaño self.size,
-        # con números del 0 al 9. 0 representa una celda vacía.
-        self.content = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        # Los números predeterminados del sudoku, no se pueden cambiar
-        self.given = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        # Una matriz expresando si el número en dicha posición es correcto
-        self.correct = [[True for _ in range(self.size)] for _ in range(self.size)]
+        # El tablero en sí, en su forma compacta (ver board.py). content,
+        # given y correct son vistas sobre él.
+        self.board = Board(self.grade)
+        # Índices de las celdas de cada unidad y unidades de cada celda
+        self.layout = Layout.get(self.grade)
+        # Cantidad de celdas llenas, y de celdas con conflictos
+        self.filled = 0
+        self.conflicts = 0
+        # Celdas cuyo estado de correcto/incorrecto cambió desde la última
+        # llamada a update_conflicts. Como el cuadro, se crea al necesitarse,
+        # para que los tableros que nunca se juegan no lo paguen.
+        self._changed_correct = None
+        # Último cuadro dibujado por render, y celdas que cambiaron desde él
+        self._lines = None
+        self._dirty = None
+        # Máscaras de bits con los números presentes en cada unidad: primero
+        # las filas, luego las columnas y al final los subcuadrados. El bit n
+        # está encendido si el número n aparece en la unidad.
+        # Para que estén al día, el contenido sólo se modifica con set_cell
+        # o a través de self.content. Se guardan en un array de enteros de
+        # 64 bits, en lugar de una lista de objetos int.
+        self.masks = array('Q', bytes(8*3*self.size))
+        # Cuántas veces aparece cada número en cada unidad, en el mismo orden
+        # que las máscaras. Sirve para apagar un bit sólo cuando ya no queda
+        # ninguna celda con ese número, aunque el tablero tenga errores.
+        # Nunca pasan de size, así que cabe cada una en un byte.
+        self.counts = bytearray(3*self.size*(self.size+1))
+        # Todos los números posibles, del 1 a self.size
+        self.full_mask = ((1 << self.size) - 1) << 1
+        # Generador de números aleatorios (random.Random) que se usa para
+        # generar el sudoku. Por default es el generador global de random;
+        # con uno propio y una semilla, el sudoku se puede volver a generar.
+        self.rng = random if rng is None else rng
         # Calcular dificultad.
         # Quitar entre el 45% de celdas al 78%, dependiendo de la dificultad.
         p = interpolate(difficulty, .45, .78)
@@ -30,8 +72,20 @@ class Sudoku():
         # La desviación estándar sera de 4 celdas. El 65% de las
         # veces se quitarán 4 celdas más o menos que el porcentaje calculado,
         # y se quitarán 8 dentro del 95%, esto en caso de una celda 9x9.
-        self.difficulty = normalvariate(p, 0.025)
+        self.difficulty = self.rng.normalvariate(p, 0.025)
         self.callback = callback
+        # Motor para resolver el tablero (ver solver.py), por nombre o
+        # instancia. Si es None se usa recursive_solve.
+        self.solver = solver
+        # Estadísticas de la última vez que se resolvió con un motor
+        self.solver_stats = None
+        # La solución completa, como lista plana, una vez generado el sudoku
+        self.solution = None
+        # Estadísticas opcionales de la generación (ver stats.py), y si las
+        # versiones que cuentan de recursive_solve y check_safe están
+        # instaladas en la instancia
+        self._counting = False
+        self.stats = stats
 
     def set_cell(self, col, row, n, delay=0):
         """Le asigna el valor n a la celda especificada por su columna y fila."""
@@ -40,21 +94,152 @@ class Sudoku():
             sleep(delay)
         if self.callback is not None:
             self.callback()
-        self.content[row][col] = n
+        self._write(col, row, n)
+
+    # Las siguientes son vistas sobre self.board, que se usan como matrices
+    # del tamaño self.size. Se crean en cada acceso, para que un tablero
+    # guardado no cargue con ellas.
+
+    @property
+    def content(self):
+        """Contenido del sudoku, con números del 0 al 9. 0 representa una
+        celda vacía. Escribir en ella equivale a usar set_cell sin pausas
+        ni callback."""
+        return GridView(self.size, self._get_content, self._set_content)
+
+    @property
+    def given(self):
+        """Los números predeterminados del sudoku, no se pueden cambiar. Las
+        celdas que no son predeterminadas valen 0."""
+        return GridView(self.size, self._get_given, self._set_given)
+
+    @property
+    def correct(self):
+        """Una matriz expresando si el número en dicha posición es correcto.
+        Se mantiene al día en cada escritura, no hace falta revisarla."""
+        return GridView(self.size, self._get_correct, self._set_correct)
+
+    def _get_content(self, idx):
+        return self.board.data[idx]
+
+    def _set_content(self, idx, n):
+        self._write(idx % self.size, idx // self.size, n)
+
+    def _get_given(self, idx):
+        return self.board.data[idx] if self.board.is_given(idx) else 0
+
+    def _set_given(self, idx, n):
+        self.board.set_given(idx, n != 0)
+
+    def _get_correct(self, idx):
+        return self.board.is_correct(idx)
+
+    def _set_correct(self, idx, correct):
+        # El estado se deriva del tablero, así que sólo se vuelve a calcular
+        self._refresh(idx)
+
+    def _write(self, col, row, n):
+        """Escribe n en la celda, manteniendo al día las máscaras y contadores
+        de su fila, columna y subcuadrado."""
+        idx = row*self.size + col
+        data = self.board.data
+        old = data[idx]
+        if old == n:
+            return
+        data[idx] = n
+        # Sin cuadro guardado no hace falta recordar qué cambió: el primer
+        # render_diff dibuja todo
+        if self._lines is not None:
+            self._dirty.add(idx)
+        self.filled += (n != 0) - (old != 0)
+        stride = self.size + 1
+        # Celdas que pueden haber cambiado de correctas a incorrectas o al revés
+        stale = [idx]
+        for unit in self.layout.cell_units[idx]:
+            if old:
+                i = unit*stride + old
+                self.counts[i] -= 1
+                if not self.counts[i]:
+                    self.masks[unit] &= ~(1 << old)
+                elif self.counts[i] == 1:
+                    # Queda una sola celda con el número viejo, puede que
+                    # ya no tenga conflictos
+                    stale.extend(j for j in self.layout.units[unit] if data[j] == old)
+            if n:
+                i = unit*stride + n
+                self.counts[i] += 1
+                self.masks[unit] |= 1 << n
+                if self.counts[i] == 2:
+                    # La otra celda con el número nuevo ahora tiene conflicto
+                    stale.extend(j for j in self.layout.units[unit] if data[j] == n and j != idx)
+        for j in stale:
+            self._refresh(j)
+
+    def _refresh(self, idx):
+        """Recalcula si la celda idx es correcta a partir de los contadores."""
+        n = self.board.data[idx]
+        stride = self.size + 1
+        correct = n == 0 or all(self.counts[unit*stride + n] == 1
+                                for unit in self.layout.cell_units[idx])
+        if correct != self.board.is_correct(idx):
+            self.board.set_correct(idx, correct)
+            self.conflicts += -1 if correct else 1
+            # Si la celda vuelve a su estado anterior, ya no cuenta como cambio
+            if self._changed_correct is None:
+                self._changed_correct = set()
+            self._changed_correct ^= {idx}
+
+    def is_correct(self, col, row):
+        """Retorna si el número en la celda (col, row) no tiene conflictos."""
+        return self.board.is_correct(row*self.size + col)
+
+    def _rebuild_masks(self):
+        """Recalcula las máscaras y contadores a partir de self.board."""
+        self.masks = array('Q', bytes(8*3*self.size))
+        self.counts = bytearray(3*self.size*(self.size+1))
+        self.filled = 0
+        self.conflicts = 0
+        self._lines = None
+        values = list(self.board.cells())
+        for idx in range(self.size**2):
+            self.board.data[idx] = 0
+            self.board.set_correct(idx, True)
+        for (idx, n) in enumerate(values):
+            if n:
+                self._write(idx % self.size, idx // self.size, n)
+        self._changed_correct = None
+
+    def candidates(self, col, row):
+        """Retorna una máscara de bits con los números que se pueden colocar
+        en la celda (col, row) sin romper las reglas. El bit n representa al
+        número n."""
+        box = row//self.grade*self.grade + col//self.grade
+        used = self.masks[row] | self.masks[self.size + col] | self.masks[2*self.size + box]
+        out = self.full_mask & ~used
+        # El número de la propia celda no cuenta contra ella
+        n = self.board.data[row*self.size + col]
+        if n and self.check_safe(col, row, n):
+            out |= 1 << n
+        return out
 
     def is_solved(self):
-        """Revisar si el sudoku está resuelto."""
-        for row in range(self.size):
-            for col in range(self.size):
-                cell = self.content[row][col]
-                self.correct[row][col] = self.check_safe(col, row, cell)
-                correct = (self.correct[row][col]) and cell != 0
-                if not correct:
-                    return False
-        return True
+        """Revisar si el sudoku está resuelto: todas las celdas están llenas
+        y ninguna tiene conflictos."""
+        return self.filled == self.size**2 and self.conflicts == 0
 
-    def generate_sudoku(self):
-        """Genera un sudoku nuevo, y su solución."""
+    def generate_sudoku(self, unique=False, method='search'):
+        """Genera un sudoku nuevo, y su solución.
+
+        Argumentos:
+        unique: si es verdadero, sólo se quitan celdas mientras el sudoku
+        siga teniendo una única solución. En dificultades altas puede que
+        se quiten menos celdas de las calculadas.
+        method: cómo obtener el tablero resuelto. 'search' llena los
+        cuadrados diagonales y resuelve el resto; 'transform' aplica
+        transformaciones aleatorias a un tablero ya resuelto (ver
+        transformed_grid), sin ninguna búsqueda."""
+        if method not in ('search', 'transform'):
+            raise ValueError(f'Método desconocido: {method!r}')
         # Adaptado de https://www.geeksforgeeks.org/program-sudoku-generator/
         # Intentaré sólo usar los pasos proporcionados, sin mirar al
         # código para ver si lo puedo lograr solo.
@@ -80,19 +265,124 @@ class Sudoku():
         #     cell = 0 // borramos la celda, estábamos mal en algún otro lado
         #     return false // la ruta no fue segura
 
-        # Paso 1: Llenar los cuadros diagonales
-        for i in range(self.grade if self.grade > 2 else 1):
-            self.fill_subsquare((i*self.grade)+i)
-
-        # Paso 2: Resolver!!!
-        self.recursive_solve(self.grade, 0)
+        if self._stats is not None:
+            self._stats.reset()
+        start = perf_counter()
+        if method == 'transform':
+            # Pasos 1 y 2 de una vez: derivar un tablero resuelto de otro
+            with self._phase('transform'):
+                for (idx, n) in enumerate(self.transformed_grid()):
+                    self._write(idx % self.size, idx // self.size, n)
+        else:
+            # Paso 1: Llenar los cuadros diagonales
+            with self._phase('fill'):
+                for i in range(self.grade if self.grade > 2 else 1):
+                    self.fill_subsquare((i*self.grade)+i)
+
+            # Paso 2: Resolver!!!
+            with self._phase('solve'):
+                self.solve()
+        self.solution = list(self.board.cells())
 
         # Paso 3: Ahora que tenemos un tablero válido, podemos quitar números.
         # Quitamos las celdas según la dificultad calculada en __init__
         # Calcular cuántas celdas tenemos que quitar, ya que el valor de
         # dificultad es un porcentaje.
         squares = int(self.difficulty * self.size**2)
-        self.remove_random_squares(squares)
+        with self._phase('remove'):
+            if unique:
+                self.remove_unique_squares(squares)
+            else:
+                self.remove_random_squares(squares)
+        if self._stats is not None:
+            self._stats.emit(grade=self.grade, difficulty=self.difficulty, method=method,
+                             unique=unique, elapsed=perf_counter() - start)
+
+    @property
+    def stats(self):
+        """Estadísticas de la generación (GenerationStats), o None si están
+        desactivadas."""
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats):
+        # Las versiones que cuentan de recursive_solve y check_safe sólo se
+        # instalan en la instancia con las estadísticas activadas, para que
+        # sin ellas la búsqueda no pague ni una revisión de más
+        self._stats = stats
+        if stats is None and self._counting:
+            del self.recursive_solve
+            del self.check_safe
+            self._counting = False
+        elif stats is not None and not self._counting:
+            self.recursive_solve = self._counted_recursive_solve
+            self.check_safe = self._counted_check_safe
+            self._counting = True
+
+    def _phase(self, name):
+        if self._stats is None:
+            return nullcontext()
+        return self._stats.phase(name)
+
+    def _counted_recursive_solve(self, col, row):
+        stats = self._stats
+        stats.nodes += 1
+        stats.depth += 1
+        if stats.depth > stats.max_depth:
+            stats.max_depth = stats.depth
+        try:
+            solved = Sudoku.recursive_solve(self, col, row)
+        finally:
+            stats.depth -= 1
+        if not solved:
+            stats.backtracks += 1
+        return solved
+
+    def _counted_check_safe(self, col, row, n):
+        self._stats.check_safe_calls += 1
+        return Sudoku.check_safe(self, col, row, n)
+
+    def solve(self):
+        """Resuelve el tablero con el motor configurado en self.solver,
+        o con recursive_solve si no hay ninguno. Retorna verdadero si se
+        encontró una solución."""
+        if self.solver is None:
+            (col, row) = self.get_next_empty_cell(-1, 0)
+            if col < 0:
+                return True
+            return self.recursive_solve(col, row)
+        engine = get_solver(self.solver)
+        cells = list(self.board.cells())
+        solution = engine.solve(self.grade, cells)
+        self.solver_stats = engine.stats
+        if self._stats is not None:
+            self._stats.nodes += engine.stats.nodes
+            self._stats.backtracks += engine.stats.backtracks
+        if solution is None:
+            return False
+        for (idx, n) in enumerate(solution):
+            if not cells[idx]:
+                self.set_cell(idx % self.size, idx // self.size, n)
+        return True
+
+    def solve_iter(self, every=None, interval=None):
+        """Resuelve el tablero con una búsqueda iterativa que se puede pausar:
+        es un generador que emite eventos de progreso (ver
+        solver.IterativeSolver) cada `every` números intentados y/o cada
+        `interval` segundos, más un evento final con done=True.
+
+        A diferencia de set_cell, no hay pausas ni se llama a callback por
+        cada celda: los cambios de cada evento se aplican al tablero de una
+        vez, y callback se llama una sola vez por evento."""
+        engine = IterativeSolver()
+        cells = list(self.board.cells())
+        for event in engine.steps(self.grade, cells, every, interval):
+            for (idx, n) in event.changes.items():
+                self._write(idx % self.size, idx // self.size, n)
+            self.solver_stats = engine.stats
+            if self.callback is not None:
+                self.callback()
+            yield event
 
     def recursive_solve(self, col, row):
         """Resuelve el tablero de sudoku recursivamente mediante backtracking,
@@ -121,26 +411,17 @@ class Sudoku():
         """Verifica si un número n cumple con las reglas del Sudoku al
         ser colocado en la celda (col, row).
         Esta función asume que el tablero está en un estado válido."""
-        # No usamos la función get_neighbors ya que es muy lenta para la
-        # recursión que hacemos al generar el sudoku
-        # Revisar fila
-        for (idx, cell) in enumerate(self.content[row]):
-            # El número ya existe en la fila, salir
-            if cell != 0 and cell == n and (idx, row) != (col, row):
-                return False
-        # Revisar columna
-        for (idx, cell) in enumerate([self.content[i][col] for i in range(self.size)]):
-            if cell != 0 and cell == n and (col, idx) != (col, row):
-                return False
-        # Revisar cuadrado
-        (sq_col, sq_row) = (col//self.grade*self.grade, row//self.grade*self.grade)
-        for i in range(sq_row, sq_row+self.grade):
-            for j in range(sq_col, sq_col+self.grade):
-                cell = self.content[i][j]
-                if cell != 0 and cell == n and (j, i) != (col, row):
-                    return False
-        # Todas las pruebas se cumplieron, el número es seguro
-        return True
+        if n == 0:
+            return True
+        box = row//self.grade*self.grade + col//self.grade
+        units = (row, self.size + col, 2*self.size + box)
+        if self.board.data[row*self.size + col] == n:
+            # La celda misma ya tiene el número, es seguro sólo si es la
+            # única celda con él en sus tres unidades
+            stride = self.size + 1
+            return all(self.counts[unit*stride + n] == 1 for unit in units)
+        # Basta con revisar el bit n de las máscaras de fila, columna y cuadrado
+        return not (self.masks[units[0]] | self.masks[units[1]] | self.masks[units[2]]) & (1 << n)
 
     def get_neighbors(self, col, row):
         """Retorna todas las celdas que interactúan con la celda (col, row),
@@ -158,23 +439,29 @@ class Sudoku():
         return out
 
     def update_conflicts(self, x, y):
-        """Revisa el tablero en la posición (x, y) para determinar
-        los númeroscorrectos e incorrectos."""
-        # Checar cada 'vecino' (celdas en la misma columna, fila y cuadrado) es correcto
-        for col, row in self.get_neighbors(x, y) + [(x, y)]:
-            cell = self.content[row][col]
-            self.correct[row][col] = self.check_safe(col, row, cell)
+        """Retorna las celdas (col, row) que pasaron de correctas a
+        incorrectas o al revés desde la última llamada.
+
+        La matriz self.correct se mantiene al día con cada escritura, así
+        que ya no hace falta revisar los vecinos de (x, y); los argumentos
+        se conservan por compatibilidad."""
+        if not self._changed_correct:
+            return []
+        changed = sorted(self._changed_correct)
+        self._changed_correct.clear()
+        return [(idx % self.size, idx // self.size) for idx in changed]
 
     def get_next_empty_cell(self, col, row):
         """Regresa la posición de la siguiente celda vacía a la derecha,
         o al principio de la siguiente fila si se llegó al borde."""
         # Número de 0 a self.size^2, representando cada celda
         linear = row*self.size + col
+        data = self.board.data
         while linear < (self.size**2) - 1:
             linear += 1 # Siguiente celda
-            (j, i) = (linear%self.size, linear//self.size)
-            if self.content[i][j] == 0:
-                return (j, i) # Celda vacía, retornar su columna y fila
+            if data[linear] == 0:
+                # Celda vacía, retornar su columna y fila
+                return (linear%self.size, linear//self.size)
 
         # No hay celdas vacías
         return (-1, -1)
@@ -242,17 +529,38 @@ class Sudoku():
         # Cambiamos el orden. Esto se hace de esta manera en lugar de
         # generar coordenadas aleatorias para garantizar
         # la cantidad de celdas que se quitarán siempre va a ser lo especificado.
-        shuffle(cells)
+        self.rng.shuffle(cells)
         for (i, cell) in enumerate(cells):
             x, y = cell % self.size, cell // self.size
             if i < n: # Celda a quitar
                 # Resetear celda
-                self.content[y][x] = 0
-                self.correct[y][x] = None
+                self._write(x, y, 0)
             else: # Celda predeterminada
                 self.given[y][x] = self.content[y][x]
 
 
+    def remove_unique_squares(self, n):
+        """Como remove_random_squares, pero salta las celdas cuya eliminación
+        haría que el tablero tuviera más de una solución. Asume que el
+        tablero está resuelto. Retorna la cantidad de celdas quitadas."""
+        checker = UniquenessChecker(self.grade, self.board.cells())
+        cells = list(range(self.size**2))
+        self.rng.shuffle(cells)
+        removed = 0
+        for cell in cells:
+            x, y = cell % self.size, cell // self.size
+            if removed < n and checker.try_remove(cell):
+                removed += 1
+                self._write(x, y, 0)
+            else:
+                self.given[y][x] = self.content[y][x]
+        return removed
+
+    def count_solutions(self, limit=2):
+        """Cuenta las soluciones del tablero, hasta un máximo de limit."""
+        cells = self.board.cells()
+        return PropagationSolver().count_solutions(self.grade, cells, limit)
+
     def fill_subsquare(self, n):
         """Llena un cuadrado 3x3 con números aleatorios.
 
@@ -262,12 +570,57 @@ class Sudoku():
         # Calcular las coordenadas del cuadrado.
         (sq_col, sq_row) = ((n % self.grade)*self.grade, (n // self.grade) * self.grade)
         nums = list(range(1,self.size+1))
-        shuffle(nums)
+        self.rng.shuffle(nums)
         for i in range(sq_row, sq_row+self.grade):
             for j in range(sq_col, sq_col+self.grade):
                 (k, l) = (i-sq_row, j-sq_col)
                 self.set_cell(j, i, nums[k*self.grade + l])
 
+    @staticmethod
+    def seed_grid(grade):
+        """Retorna un tablero resuelto del grado especificado, como tupla
+        plana. Se construye una sola vez por grado con el patrón
+        (grade*(fila % grade) + fila//grade + columna) % size + 1, que
+        desplaza cada fila de manera que nunca se repiten números en filas,
+        columnas ni cuadrados."""
+        if grade not in _SEED_GRIDS:
+            size = grade**2
+            _SEED_GRIDS[grade] = tuple(
+                (grade*(row % grade) + row//grade + col) % size + 1
+                for row in range(size) for col in range(size)
+            )
+        return _SEED_GRIDS[grade]
+
+    def transformed_grid(self):
+        """Retorna un tablero resuelto nuevo, como lista plana, aplicando a
+        seed_grid una combinación aleatoria (con self.rng) de
+        transformaciones que conservan un tablero válido: cambiar los
+        números entre sí, reordenar las filas dentro de cada banda de
+        cuadrados, reordenar las bandas, lo mismo con las columnas, y
+        transponer. Cuesta O(size²), sin búsqueda."""
+        seed = Sudoku.seed_grid(self.grade)
+        labels = list(range(1, self.size+1))
+        self.rng.shuffle(labels)
+        labels.insert(0, 0)
+
+        def order():
+            # Orden aleatorio de las bandas, y de las líneas dentro de cada una
+            bands = list(range(self.grade))
+            self.rng.shuffle(bands)
+            out = []
+            for band in bands:
+                lines = list(range(band*self.grade, (band+1)*self.grade))
+                self.rng.shuffle(lines)
+                out.extend(lines)
+            return out
+
+        rows = order()
+        cols = order()
+        if self.rng.random() < 0.5:
+            # Transponer: las filas del tablero base se leen como columnas
+            return [labels[seed[c*self.size + r]] for r in rows for c in cols]
+        return [labels[seed[r*self.size + c]] for r in rows for c in cols]
+
     def rendered_size(self):
         """Regresa el tamaño del tablero de Sudoku, en caracteres.
 
@@ -275,55 +628,63 @@ class Sudoku():
         Una tupla, con la longitud y altura."""
         return (self.size*4+1, self.size*2+1)
 
-    def render(self, show_nums=True):
-        """Retorna un string con el tablero de sudoku.
+    @staticmethod
+    def render_frame(grade, font='double'):
+        """Retorna la cuadrícula vacía (sin números) de un tablero del grado
+        especificado, como una tupla de líneas. Las líneas nunca cambian,
+        así que se construye una sola vez por grado y fuente.
 
         Argumentos:
-        show_nums: si mostrar los números de la cuadrícula o no. Default es sí."""
-        boxchars = SUDOKU_FONTS['double']
-        numchars = CHAR_FONTS['alpha']
+        grade: grado del tablero.
+        font: nombre de la fuente en SUDOKU_FONTS."""
+        if (grade, font) in _FRAMES:
+            return _FRAMES[(grade, font)]
+        size = grade**2
+        boxchars = SUDOKU_FONTS[font]
         # La lógica para renderizar esta cuadrícula inspirada en este repositorio:
         # https://github.com/thisisparker/cursewords
         # El tablero está compuesto de líneas mayores y menores.
         # Las mayores suceden cada 3 celdas
         # y en los bordes externos, y las menores en el resto de las líneas.
+        # La siguiente tabla determina los caracteres
+        # para esta sección. 'j == 0' representa si es la primera
+        # columna, 'i == 0' si es la primera fila.
+        #         j == 0   j != 0
+        #        ┏━━━━━━━┳━━━━━━━┓
+        # i == 0 ┃   ┏   ┃ ┯ ó ┳ ┃
+        #        ┣━━━━━━━╋━━━━━━━┫
+        # i != 0 ┃   ┣   ┃ ┿ ó ╋ ┃
+        #        ┗━━━━━━━┻━━━━━━━┛
+        # PODEMOS USAR UNA MATRIZ!!!
+        # (Se arma una sola vez, no en cada celda.)
+        # Será de tres dimensiones, ya que las dos dimensiones
+        # son las especificadas en la tabla, y la tercera será
+        # si estamos en una línea mayor o menor
+        char_possibilities = [
+            [
+                # Se repite ya que los caracteres son lo mismo
+                # estén o no en una linea vertical mayor
+                [boxchars['ulcorner'], boxchars['ulcorner']],
+                # No necesitamos hacer esto una lista, ya está bien
+                boxchars['hdline']
+            ],
+            [
+                [boxchars['vrline'][1], boxchars['vrline'][1]],
+                # ┿ ó ╋ dependiendo si está en una linea vert. mayor
+                [boxchars['cross'][2], boxchars['cross'][3]]
+            ]
+        ]
         grid = []
-        for i in range(self.size): # cada hilera de celdas
+        for i in range(size): # cada hilera de celdas
             # cada celda mide dos hileras de caracteres (y cuatro columnas),
             # y sobra una extra en el final en ambas dimensiones.
             row = ['', '']
-            for j in range(self.size): # cada columna de celdas
+            for j in range(size): # cada columna de celdas
                 ###### línea horizontal mayor ######
-                if i % self.grade == 0:
-                    # Esta variable indica si estamos en una línea mayor/menor
-                    on_major = j % self.grade == 0
-                    # La siguiente tabla determina los caracteres
-                    # para esta sección. 'j == 0' representa si es la primera
-                    # columna, 'i == 0' si es la primera fila.
-                    #         j == 0   j != 0
-                    #        ┏━━━━━━━┳━━━━━━━┓
-                    # i == 0 ┃   ┏   ┃ ┯ ó ┳ ┃
-                    #        ┣━━━━━━━╋━━━━━━━┫
-                    # i != 0 ┃   ┣   ┃ ┿ ó ╋ ┃
-                    #        ┗━━━━━━━┻━━━━━━━┛
-                    # PODEMOS USAR UNA MATRIZ!!!
-                    # Será de tres dimensiones, ya que las dos dimensiones
-                    # son las especificadas en la tabla, y la tercera será
-                    # si estamos en una línea mayor o menor
-                    char_possibilities = [
-                        [
-                            # Se repite ya que los caracteres son lo mismo
-                            # estén o no en una linea vertical mayor
-                            [boxchars['ulcorner'], boxchars['ulcorner']],
-                            # No necesitamos hacer esto una lista, ya está bien
-                            boxchars['hdline']
-                        ],
-                        [
-                            [boxchars['vrline'][1], boxchars['vrline'][1]],
-                            # ┿ ó ╋ dependiendo si está en una linea vert. mayor
-                            [boxchars['cross'][2], boxchars['cross'][3]]
-                        ]
-                    ]
+                if i % grade == 0:
+                    # Esta variable indica si estamos en una línea mayor/menor.
+                    # Los caracteres se escogen con la tabla de arriba.
+                    on_major = j % grade == 0
                     row[0] += char_possibilities[i != 0][j != 0][on_major]
                     row[0] += boxchars['hline'][1]*3
 
@@ -332,17 +693,14 @@ class Sudoku():
                     # Si esta columna está en una línea vertical mayor:
                     # ┠ si es la primera o ╂ si no
                     row[0] += boxchars['vrline'][0] if j == 0 else \
-                              boxchars['cross'][j%self.grade == 0]
+                              boxchars['cross'][j%grade == 0]
                     row[0] += boxchars['hline'][0]*3
-                # La segunda fila tiene líneas verticales y espacios únicamente
-                n = self.content[i][j]
-                # Mostrar el número en la celda, o nada si es 0
-                cell_content = \
-                    f' {numchars[n] or " "} ' if show_nums else ' '*3
-                row[1] += boxchars['vline'][j % self.grade == 0] + cell_content
+                # La segunda fila tiene líneas verticales y espacios únicamente.
+                # Los números se ponen después, en render.
+                row[1] += boxchars['vline'][j % grade == 0] + ' '*3
 
             # Añadir la última columna (la extra)
-            row[0] += boxchars['urcorner'] if i == 0 else boxchars['vlline'][i%self.grade == 0]
+            row[0] += boxchars['urcorner'] if i == 0 else boxchars['vlline'][i%grade == 0]
             row[1] += boxchars['vline'][1]
             # Añadir las dos filas completadas a la cuadrícula
             grid.extend(row)
@@ -350,28 +708,88 @@ class Sudoku():
         # Añadir la fila extra
         final_row = boxchars['llcorner']+boxchars['hline'][1]*3 \
             + ''.join([
-                boxchars['huline'][(j+1)%self.grade==0]+boxchars['hline'][1]*3\
-                    for j in range(self.size-1)
+                boxchars['huline'][(j+1)%grade==0]+boxchars['hline'][1]*3\
+                    for j in range(size-1)
             ]) \
             + boxchars['lrcorner']
 
         grid.append(final_row)
-        return grid
+        _FRAMES[(grade, font)] = tuple(grid)
+        return _FRAMES[(grade, font)]
+
+    def render(self, show_nums=True):
+        """Retorna un string con el tablero de sudoku.
+
+        Sólo se vuelven a dibujar las filas con celdas que cambiaron desde
+        el último render o render_diff.
 
+        Argumentos:
+        show_nums: si mostrar los números de la cuadrícula o no. Default es sí."""
+        if not show_nums:
+            return list(Sudoku.render_frame(self.grade))
+        self.render_diff()
+        return list(self._lines)
+
+    def render_diff(self):
+        """Actualiza el último cuadro dibujado y retorna sólo lo que cambió,
+        como una lista de tuplas (línea, columna, texto). La primera vez se
+        retorna el cuadro completo, una línea a la vez."""
+        numchars = CHAR_FONTS['alpha']
+        if self._lines is None:
+            # Primer cuadro: llenar la cuadrícula vacía con los números
+            self._dirty = set()
+            self._lines = list(Sudoku.render_frame(self.grade))
+            data = self.board.data
+            for i in range(self.size):
+                line = list(self._lines[2*i+1])
+                for j in range(self.size):
+                    # Mostrar el número en la celda, o nada si es 0
+                    line[4*j+2] = numchars[data[i*self.size + j]] or ' '
+                self._lines[2*i+1] = ''.join(line)
+            return [(i, 0, line) for (i, line) in enumerate(self._lines)]
+
+        spans = []
+        rows = {}
+        for idx in sorted(self._dirty):
+            (i, j) = (idx // self.size, idx % self.size)
+            char = numchars[self.board.data[idx]] or ' '
+            if self._lines[2*i+1][4*j+2] != char:
+                spans.append((2*i+1, 4*j+2, char))
+                rows.setdefault(2*i+1, []).append((4*j+2, char))
+        self._dirty.clear()
+        for (i, changes) in rows.items():
+            line = list(self._lines[i])
+            for (col, char) in changes:
+                line[col] = char
+            self._lines[i] = ''.join(line)
+        return spans
+
+
+    @staticmethod
+    def from_board(board, solver=None):
+        """Genera un tablero de sudoku sobre un Board existente, sin copiarlo.
+        Los cambios al sudoku se escriben directamente en el Board."""
+        sudoku = Sudoku(board.grade, solver=solver)
+        sudoku.board = board
+        sudoku._rebuild_masks()
+        return sudoku
 
     @staticmethod
-    def from_str(grade, string):
+    def from_str(grade, string, solver=None):
         """Genera un tablero de sudoku a partir de un string.
         El caracter n estará en la posición (n%size, n//size).
-        Todos los caracteres especificados serán los predeterminados."""
+        Todos los caracteres especificados serán los predeterminados.
+        solver es el motor con el que se resolverá el tablero (ver solve)."""
         if len(string) != grade**4:
             raise ValueError('El string no tiene la cantidad de elementos correcto.')
-        sudoku = Sudoku(grade)
+        sudoku = Sudoku(grade, solver=solver)
         for idx, c in enumerate(string):
             col, row = idx%grade**2, idx//grade**2
-            n = 0 if c == '.' else CHAR_FONTS['alpha'].index(c)
+            n = CHAR_VALUES.get(c)
+            if n is None:
+                raise ValueError(f'Caracter inválido: {c!r}')
             sudoku.given[row][col] = n
-            sudoku.content[row][col] = n
+            sudoku._write(col, row, n)
         return sudoku
 
 def main():
@@ -0,0 +1,142 @@
+"""Este módulo resuelve muchos tableros de Sudoku a la vez con numpy.
+
+Los N tableros se representan como un arreglo (N, size, size) de uint8, y
+sus posibilidades como un arreglo (N, size, size) de máscaras de bits,
+donde el bit n indica si el número n cabe en la celda (igual que las
+máscaras de Sudoku y solver.py). Las eliminaciones y los singles (naked y
+hidden) se calculan para todos los tableros al mismo tiempo. Sólo los
+tableros que la propagación no puede terminar se resuelven uno por uno con
+un motor de solver.py.
+
+Requiere numpy."""
+
+import numpy as np
+
+from .solver import get_solver
+
+
+def _popcount(x):
+    """Cuenta los bits encendidos de cada elemento de un arreglo uint32."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x)
+    x = x - ((x >> 1) & 0x55555555)
+    x = (x & 0x33333333) + ((x >> 2) & 0x33333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F
+    return (x * 0x01010101) >> 24
+
+
+def _box_order(grade):
+    """Retorna los índices (fila*size + columna) de las celdas de cada
+    cuadrado, como arreglo (size, size), y el cuadrado de cada celda."""
+    size = grade**2
+    cells = np.arange(size**2).reshape(grade, grade, grade, grade)
+    order = cells.transpose(0, 2, 1, 3).reshape(size, size)
+    box_of = np.empty(size**2, dtype=np.intp)
+    box_of[order] = np.arange(size)[:, None]
+    return (order, box_of.reshape(size, size))
+
+
+def _once_twice(cand, axis):
+    """Retorna, para cada unidad a lo largo de axis, las máscaras de los
+    números que caben en al menos una y en al menos dos de sus celdas."""
+    seen = np.bitwise_or.accumulate(cand, axis=axis)
+    before = np.zeros_like(seen)
+    if axis == 1:
+        before[:, 1:] = seen[:, :-1]
+    else:
+        before[:, :, 1:] = seen[:, :, :-1]
+    twice = np.bitwise_or.reduce(cand & before, axis=axis)
+    once = np.take(seen, -1, axis=axis)
+    return (once, twice)
+
+
+def propagate(grids, grade, max_rounds=None):
+    """Llena todos los singles de todos los tableros, modificando grids.
+    Retorna un arreglo con los tableros que llegaron a una contradicción;
+    el resto quedan resueltos o atorados (sin singles).
+
+    En cada ronda sólo se procesan los tableros que siguen avanzando."""
+    size = grade**2
+    full = np.uint32(((1 << size) - 1) << 1)
+    (order, box_of) = _box_order(grade)
+    dead = np.zeros(grids.shape[0], dtype=bool)
+    # Índices de los tableros que siguen avanzando
+    active = np.arange(grids.shape[0])
+    rounds = 0
+    while len(active) and (max_rounds is None or rounds < max_rounds):
+        rounds += 1
+        boards = grids[active]
+        empty = boards == 0
+        bits = np.where(empty, np.uint32(0), np.uint32(1) << boards.astype(np.uint32))
+        boxes = bits.reshape(len(active), size**2)[:, order]
+        # Números presentes en cada fila, columna y cuadrado
+        row_mask = np.bitwise_or.reduce(bits, axis=2)
+        col_mask = np.bitwise_or.reduce(bits, axis=1)
+        box_mask = np.bitwise_or.reduce(boxes, axis=2)
+        # Si una unidad tiene menos números distintos que celdas llenas,
+        # algún número está repetido
+        filled = ~empty
+        failed = (_popcount(row_mask) != filled.sum(axis=2)).any(axis=1) \
+            | (_popcount(col_mask) != filled.sum(axis=1)).any(axis=1) \
+            | (_popcount(box_mask) != filled.reshape(len(active), -1)[:, order].sum(axis=2)).any(axis=1)
+
+        used = row_mask[:, :, None] | col_mask[:, None, :] | box_mask[:, box_of]
+        cand = np.where(empty, full & ~used, np.uint32(0))
+        # Celdas vacías donde no cabe ningún número
+        failed |= (empty & (cand == 0)).any(axis=(1, 2))
+
+        # Naked singles: celdas con una sola posibilidad
+        naked = np.where((cand & (cand - np.uint32(1))) == 0, cand, np.uint32(0))
+        # Hidden singles: números que sólo caben en una celda de la fila,
+        # de la columna o del cuadrado
+        (row_once, row_twice) = _once_twice(cand, 2)
+        (col_once, col_twice) = _once_twice(cand, 1)
+        (box_once, box_twice) = _once_twice(cand.reshape(len(active), -1)[:, order], 2)
+        # Algún número ya no cabe en ninguna celda de la unidad
+        failed |= ((row_once | row_mask) != full).any(axis=1) \
+            | ((col_once | col_mask) != full).any(axis=1) \
+            | ((box_once | box_mask) != full).any(axis=1)
+        hidden = (row_once & ~row_twice)[:, :, None] | (col_once & ~col_twice)[:, None, :] \
+            | (box_once & ~box_twice)[:, box_of]
+        place = naked | (cand & hidden)
+
+        # Una celda que tendría que llevar dos números es una contradicción
+        failed |= ((place & (place - np.uint32(1))) != 0).any(axis=(1, 2))
+        dead[active[failed]] = True
+        progress = (place != 0).any(axis=(1, 2)) & ~failed
+        digits = np.log2(np.maximum(place, 1)).astype(np.uint8)
+        boards = np.where(place != 0, digits, boards)
+        grids[active[progress]] = boards[progress]
+        active = active[progress]
+    return dead
+
+
+def solve_boards(grids, grade, solver='propagation', block_size=4096):
+    """Resuelve un arreglo (N, size, size) de tableros. Retorna un arreglo
+    nuevo con las soluciones y otro booleano indicando qué tableros se
+    resolvieron; los que no tienen solución se regresan sin cambios.
+
+    Los tableros se procesan en bloques de block_size para limitar la
+    memoria del tensor de posibilidades. Los que no se terminan de resolver
+    con propagación se resuelven con el motor indicado."""
+    grids = np.asarray(grids, dtype=np.uint8)
+    size = grade**2
+    out = grids.copy()
+    solved = np.zeros(len(grids), dtype=bool)
+    engine = get_solver(solver)
+    for start in range(0, len(grids), block_size):
+        block = out[start:start + block_size]
+        dead = propagate(block, grade)
+        done = ~dead & (block != 0).all(axis=(1, 2))
+        solved[start:start + len(block)] = done
+        for k in np.flatnonzero(~done):
+            # Si hubo contradicción se empieza desde el tablero original,
+            # por si la contradicción vino de aplicar varios singles juntos
+            source = grids[start + k] if dead[k] else block[k]
+            solution = engine.solve(grade, source.ravel().tolist())
+            if solution is None:
+                block[k] = grids[start + k]
+            else:
+                block[k] = np.array(solution, dtype=np.uint8).reshape(size, size)
+                solved[start + k] = True
+    return (out, solved)